@@ -0,0 +1,124 @@
+"""
+Benchmark the compute backends on the same loaded data
+Runs every backend-aware getter on numpy, pandas, arrow and polars, checks that
+the results match the pandas backend, and prints the median time per call
+
+Without a dimension filter the getters are answered by the pricing cube's
+precomputed top lists and prefix sums, which never reach a backend, so a
+dimension filter is always applied (by default the most frequent canal).
+
+Usage:
+    python benchmark_backends.py [--data-dir .] [--repeat 5] [--start 2025-03-01 --end 2025-06-30]
+                                 [--filter uf=SP --filter neogrupo="OTC MARCA"]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from compute_backends import COMPUTE_BACKENDS, get_compute_backend
+from data_processor_optimized import OptimizedDataProcessor
+
+# Getters que passam pelo backend de cálculo
+BENCHMARK_GETTERS = [
+    ('get_revenue_metrics', {}),
+    ('get_revenue_trend', {}),
+    ('get_market_share_trend', {}),
+    ('get_channel_performance', {}),
+    ('get_category_performance', {}),
+    ('get_state_performance', {}),
+    ('get_top_products', {'top_n': 20})
+]
+
+
+def _same_result(expected, actual):
+    """Compare getter results (DataFrames or metric dicts) with a float tolerance"""
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(
+            np.isclose(expected[key], actual[key], rtol=1e-6) for key in expected)
+    try:
+        pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True),
+                                      check_exact=False, rtol=1e-6)
+        return True
+    except AssertionError:
+        return False
+
+
+def _parse_filters(items):
+    """['uf=SP', 'uf=RJ', 'canal=App'] -> {'uf': ['SP', 'RJ'], 'canal': ['App']}"""
+    filters = {}
+    for item in items or []:
+        dimension, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Filtro inválido: '{item}' (use dimensão=valor)")
+        filters.setdefault(dimension.strip(), []).append(value.strip())
+    return filters
+
+
+def benchmark(data_dir=".", repeat=5, start=None, end=None, filters=None):
+    """Median ms per getter and backend -> DataFrame (getters x backends)
+
+    filters are set_filters dimensions; without any, the most frequent canal
+    is used so the getters go through the backends instead of the cube's
+    precomputed lists.
+    """
+    processor = OptimizedDataProcessor(data_dir)
+    processor.quick_load()
+    processor.result_cache = None  # Medir o cálculo, não o cache de resultados
+    processor.pricing_prefix = False  # Nem as somas acumuladas do cubo de preços
+    if not filters:
+        # Sem filtro de dimensão as listas pré-calculadas do cubo respondem sozinhas
+        filters = {'canal': processor.pricing_data['canal'].value_counts().idxmax()}
+    print(f"Filtros: {filters}")
+    processor.set_filters(pd.Timestamp(start) if start else None, pd.Timestamp(end) if end else None,
+                          **filters)
+
+    backends = []
+    for name in COMPUTE_BACKENDS:
+        try:
+            get_compute_backend(name)
+            backends.append(name)
+        except ImportError as e:
+            print(f"⚠️  {e} - ignorado")
+
+    timings = {}
+    for name in backends:
+        for getter, kwargs in BENCHMARK_GETTERS:
+            processor.compute_backends = {'default': name}
+            method = getattr(processor, getter)
+            result = method(**kwargs)  # Aquecimento (conversão do frame é feita uma vez)
+
+            elapsed = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                method(**kwargs)
+                elapsed.append((time.perf_counter() - start_time) * 1000)
+
+            processor.compute_backends = {'default': 'pandas'}
+            if not _same_result(getattr(processor, getter)(**kwargs), result):
+                print(f"⚠️  {getter}: resultado de '{name}' difere do pandas")
+            timings.setdefault(getter, {})[name] = np.median(elapsed)
+
+    result = pd.DataFrame(timings).T[backends]
+    result['mais_rapido'] = result.idxmin(axis=1)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara os backends de cálculo nos mesmos dados")
+    parser.add_argument('--data-dir', default=".", help="Diretório com Preço.csv e historico_iqvia_*.parquet")
+    parser.add_argument('--repeat', type=int, default=5, help="Execuções medidas por getter")
+    parser.add_argument('--start', help="Início do filtro de data (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Fim do filtro de data (YYYY-MM-DD)")
+    parser.add_argument('--filter', action='append', metavar='DIM=VALOR',
+                        help="Filtro de dimensão (canal, uf ou neogrupo); repetível")
+    args = parser.parse_args()
+
+    timings = benchmark(args.data_dir, args.repeat, args.start, args.end, _parse_filters(args.filter))
+    print("\nTempo mediano por chamada (ms):")
+    print(timings.round(2).to_string())
+
+    fastest = ','.join(f"{getter}={row['mais_rapido']}" for getter, row in timings.iterrows())
+    print(f"\nSugestão: RD_COMPUTE_BACKEND=\"{fastest}\"")
@@ -0,0 +1,357 @@
+"""
+Pluggable compute backends for the processor getters
+One group-by/aggregate primitive implemented on pandas, pyarrow.compute,
+Polars (lazy) and a NumPy bincount kernel, all returning the same pandas
+DataFrame
+"""
+
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+try:
+    import polars as pl
+except ImportError:  # Backend opcional: pip install polars
+    pl = None
+
+# Agregações suportadas por todos os backends
+AGG_FUNCS = ('sum', 'mean', 'nunique', 'first', 'size')
+
+# Grupos densos (bincount direto) até este número de combinações de chaves
+_DENSE_GROUPS_MIN = 1 << 16
+
+
+class ComputeBackend:
+    """Group-by/aggregate over a pandas frame with optional inclusive range filters
+
+    groupby_agg(df, keys, aggs, filters, rows) takes aggs as {output: (column, func)}
+    with func in AGG_FUNCS, filters as {column: (low, high)} and rows as a
+    (start, stop) positional range, sliced without copying, or as an array of
+    row positions. The result has
+    the keys (sorted) followed by the outputs in order, with the same dtypes on
+    every backend: keys and 'first' keep the source dtype, integer sums are
+    int64, other sums and means float64, counts int64. keys=[] gives one row.
+    """
+
+    name = None
+
+    def __init__(self):
+        self._converted = {}
+
+    def _convert(self, df):
+        """Engine-native copy of df, converted once per frame and dropped with the frame"""
+        key = id(df)
+        entry = self._converted.get(key)
+        if entry is None or entry[0]() is not df:
+            # Referência fraca: frames temporários (totais por período) saem do cache sozinhos
+            converted = self._converted
+            ref = weakref.ref(df, lambda _, key=key: converted.pop(key, None))
+            entry = (ref, self._to_native(df))
+            converted[key] = entry
+        return entry[1]
+
+    def _to_native(self, df):
+        return df
+
+    def _aggregate(self, df, keys, aggs, filters, rows):
+        raise NotImplementedError
+
+    def groupby_agg(self, df, keys, aggs, filters=None, rows=None):
+        keys = list(keys)
+        result = self._aggregate(df, keys, aggs, filters or {}, rows)
+        return self._finish(result, df, keys, aggs)
+
+    @staticmethod
+    def _as_dtype(values, source):
+        """Cast to the source dtype; categoricals get the source categories in order"""
+        if isinstance(source, pd.CategoricalDtype):
+            return pd.Categorical(values.astype(source.categories.dtype), categories=source.categories)
+        return values.astype(source)
+
+    @staticmethod
+    def _finish(result, df, keys, aggs):
+        """Column order, key order and dtypes shared by all backends"""
+        result = result[keys + list(aggs)]
+        # Chaves no dtype de origem antes de ordenar: categorias do engine podem vir em outra ordem
+        for key in keys:
+            result[key] = ComputeBackend._as_dtype(result[key], df[key].dtype)
+        if keys:
+            result = result.sort_values(keys, ignore_index=True)
+        else:
+            result = result.reset_index(drop=True)
+
+        for out, (col, func) in aggs.items():
+            source = df[col].dtype
+            if func in ('nunique', 'size'):
+                result[out] = result[out].fillna(0).astype('int64')
+            elif func == 'first':
+                result[out] = ComputeBackend._as_dtype(result[out], source)
+            elif func == 'sum' and pd.api.types.is_integer_dtype(source):
+                result[out] = result[out].fillna(0).astype('int64')
+            else:
+                result[out] = result[out].astype('float64')
+        return result
+
+
+class PandasBackend(ComputeBackend):
+    """Boolean-mask filter + DataFrame.groupby"""
+
+    name = 'pandas'
+
+    def _aggregate(self, df, keys, aggs, filters, rows):
+        if isinstance(rows, tuple):
+            df = df.iloc[rows[0]:rows[1]]
+        elif rows is not None:
+            df = df.iloc[rows]
+        for col, (low, high) in filters.items():
+            df = df[(df[col] >= low) & (df[col] <= high)]
+
+        named = {out: (col, 'size' if func == 'size' else func) for out, (col, func) in aggs.items()}
+        if keys:
+            return df.groupby(keys, observed=True, sort=True).agg(**named).reset_index()
+
+        row = {}
+        for out, (col, func) in aggs.items():
+            if func == 'size':
+                row[out] = len(df)
+            elif func == 'first':
+                valid = df[col].dropna()
+                row[out] = valid.iloc[0] if len(valid) else None
+            else:
+                row[out] = getattr(df[col], func)()
+        return pd.DataFrame([row])
+
+
+class ArrowBackend(ComputeBackend):
+    """pyarrow.compute filter + Table.group_by on a cached Arrow table"""
+
+    name = 'arrow'
+
+    _FUNCS = {'sum': 'sum', 'mean': 'mean', 'nunique': 'count_distinct', 'first': 'first',
+              'size': 'count_all'}
+
+    def _to_native(self, df):
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def _aggregate(self, df, keys, aggs, filters, rows):
+        table = self._convert(df)
+        if isinstance(rows, tuple):
+            table = table.slice(rows[0], rows[1] - rows[0])
+        elif rows is not None:
+            table = table.take(rows)
+        mask = None
+        for col, (low, high) in filters.items():
+            column = table.column(col)
+            low, high = pa.scalar(low, column.type), pa.scalar(high, column.type)
+            condition = pc.and_(pc.greater_equal(column, low), pc.less_equal(column, high))
+            mask = condition if mask is None else pc.and_(mask, condition)
+        if mask is not None:
+            table = table.filter(mask)
+
+        specs, names, dictionaries = [], [], {}
+        for out, (col, func) in aggs.items():
+            if func == 'first' and pa.types.is_dictionary(table.column(col).type):
+                # hash_first não aceita dictionary: agregar os códigos e decodificar depois
+                column = table.column(col).unify_dictionaries().combine_chunks()
+                dictionaries[out] = column.dictionary
+                table = table.append_column(f"__codes_{out}", column.indices)
+                col = f"__codes_{out}"
+            # count_all não recebe coluna
+            specs.append(([], 'count_all') if func == 'size' else (col, self._FUNCS[func]))
+            names.append(out)
+
+        # Sem threads: 'first' depende da ordem original das linhas
+        grouped = table.group_by(keys, use_threads=False).aggregate(specs)
+        grouped = grouped.rename_columns(keys + names)
+        for out, dictionary in dictionaries.items():
+            grouped = grouped.set_column(grouped.schema.get_field_index(out), out,
+                                         dictionary.take(grouped.column(out)))
+        return grouped.to_pandas()
+
+
+class PolarsBackend(ComputeBackend):
+    """Polars lazy query (filter -> group_by -> agg) on a cached Polars frame"""
+
+    name = 'polars'
+
+    def __init__(self):
+        if pl is None:
+            raise ImportError("Backend 'polars' requer o pacote polars (pip install polars)")
+        super().__init__()
+
+    def _to_native(self, df):
+        return pl.from_pandas(df)
+
+    @staticmethod
+    def _expression(out, col, func):
+        if func == 'size':
+            return pl.len().alias(out)
+        if func == 'nunique':
+            return pl.col(col).drop_nulls().n_unique().alias(out)
+        if func == 'first':
+            return pl.col(col).drop_nulls().first().alias(out)
+        return getattr(pl.col(col), func)().alias(out)
+
+    def _aggregate(self, df, keys, aggs, filters, rows):
+        frame = self._convert(df)
+        if isinstance(rows, tuple):
+            frame = frame.slice(rows[0], rows[1] - rows[0])
+        elif rows is not None:
+            frame = frame[rows]
+        query = frame.lazy()
+        for col, (low, high) in filters.items():
+            query = query.filter(pl.col(col).is_between(pl.lit(low), pl.lit(high), closed='both'))
+
+        exprs = [self._expression(out, col, func) for out, (col, func) in aggs.items()]
+        query = query.group_by(keys, maintain_order=True).agg(exprs) if keys else query.select(exprs)
+        return query.collect().to_pandas()
+
+
+class NumpyBackend(ComputeBackend):
+    """Integer-coded group-by: key columns factorized once per frame, np.bincount per aggregate"""
+
+    name = 'numpy'
+
+    def _to_native(self, df):
+        return {}  # Códigos por coluna, preenchidos sob demanda
+
+    def _codes(self, df, col):
+        """(codes, uniques) of a column: -1 for nulls, uniques sorted (categories in order)"""
+        cache = self._convert(df)
+        if col not in cache:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                cache[col] = (series.cat.codes.to_numpy().astype(np.int64), series.cat.categories)
+            else:
+                codes, uniques = pd.factorize(series, sort=True)
+                cache[col] = (codes.astype(np.int64), uniques)
+        return cache[col]
+
+    @staticmethod
+    def _take(values, rows):
+        if isinstance(rows, tuple):
+            return values[rows[0]:rows[1]]
+        return values if rows is None else values[rows]
+
+    def _aggregate(self, df, keys, aggs, filters, rows):
+        if filters:
+            mask = np.ones(len(df), dtype=bool)
+            for col, (low, high) in filters.items():
+                mask &= ((df[col] >= low) & (df[col] <= high)).to_numpy()
+            selected = np.flatnonzero(mask)
+            rows = selected if rows is None else np.intersect1d(
+                np.arange(rows[0], rows[1]) if isinstance(rows, tuple) else rows, selected)
+
+        # Código do grupo = combinação mista das chaves (ordem lexicográfica = ordem das chaves)
+        if isinstance(rows, tuple):
+            n_rows = rows[1] - rows[0]
+        else:
+            n_rows = len(df) if rows is None else len(rows)
+        groups = np.zeros(n_rows, dtype=np.int64)
+        valid = np.ones(n_rows, dtype=bool)
+        n_groups, radices, uniques = 1, [], []
+        for key in keys:
+            codes, key_uniques = self._codes(df, key)
+            codes = self._take(codes, rows)
+            valid &= codes >= 0
+            groups = groups * len(key_uniques) + codes
+            n_groups *= len(key_uniques)
+            radices.append(len(key_uniques))
+            uniques.append(key_uniques)
+
+        index = np.flatnonzero(valid) if not valid.all() else None
+        if index is not None:
+            groups = groups[index]
+        bins = None
+        if n_groups > max(_DENSE_GROUPS_MIN, 2 * len(groups)):
+            # Muitas combinações possíveis: compactar para os grupos presentes
+            bins, groups = np.unique(groups, return_inverse=True)
+            n_groups = len(bins)
+
+        def values_of(col):
+            values = self._take(df[col].to_numpy(), rows)
+            return values if index is None else values[index]
+
+        counts = np.bincount(groups, minlength=n_groups)
+        present = np.flatnonzero(counts) if keys else np.arange(1)
+        result = {}
+        if keys:
+            flat = present if bins is None else bins[present]
+            for key, codes, key_uniques in zip(keys, np.unravel_index(flat, radices), uniques):
+                result[key] = np.asarray(key_uniques)[codes]
+
+        for out, (col, func) in aggs.items():
+            if func == 'size':
+                result[out] = counts[present]
+                continue
+            if func in ('nunique', 'first'):
+                codes, col_uniques = self._codes(df, col)
+                codes = self._take(codes, rows)
+                if index is not None:
+                    codes = codes[index]
+                has_value = codes >= 0
+                if func == 'nunique':
+                    n_values = max(len(col_uniques), 1)
+                    pairs = groups[has_value] * n_values + codes[has_value]
+                    if n_groups * n_values <= max(_DENSE_GROUPS_MIN, 2 * len(pairs)):
+                        seen = np.bincount(pairs, minlength=n_groups * n_values).reshape(n_groups, n_values)
+                        result[out] = np.count_nonzero(seen, axis=1)[present]
+                    else:
+                        pairs = np.unique(pairs)
+                        result[out] = np.bincount(pairs // n_values, minlength=n_groups)[present]
+                else:
+                    # Primeira linha com valor de cada grupo (na ordem original)
+                    first_groups, first_rows = np.unique(groups[has_value], return_index=True)
+                    first = np.full(n_groups, -1, dtype=np.int64)
+                    first[first_groups] = codes[has_value][first_rows]
+                    chosen = first[present]
+                    decoded = np.asarray(col_uniques, dtype=object)[np.maximum(chosen, 0)]
+                    result[out] = np.where(chosen >= 0, decoded, None)
+                continue
+
+            values = values_of(col)
+            if values.dtype.kind == 'f':
+                has_value = ~np.isnan(values)
+                sums = np.bincount(groups[has_value], weights=values[has_value], minlength=n_groups)
+                value_counts = np.bincount(groups[has_value], minlength=n_groups)
+            else:
+                sums = np.bincount(groups, weights=values, minlength=n_groups)
+                value_counts = counts
+            if func == 'sum':
+                result[out] = sums[present]
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result[out] = (sums / value_counts)[present]
+        return pd.DataFrame(result, columns=keys + list(aggs))
+
+
+COMPUTE_BACKENDS = {
+    'numpy': NumpyBackend,
+    'pandas': PandasBackend,
+    'arrow': ArrowBackend,
+    'polars': PolarsBackend
+}
+
+
+def get_compute_backend(name='numpy'):
+    """Backend instance by name (see COMPUTE_BACKENDS)"""
+    try:
+        return COMPUTE_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Backend de cálculo desconhecido: {name} "
+                         f"(opções: {', '.join(COMPUTE_BACKENDS)})") from None
+
+
+def parse_backend_config(config):
+    """'polars' or 'pandas,get_top_products=arrow' -> {'default': ..., getter: ...}"""
+    backends = {'default': 'numpy'}
+    for item in filter(None, (part.strip() for part in str(config or '').split(','))):
+        if '=' in item:
+            getter, name = (part.strip() for part in item.split('=', 1))
+            backends[getter] = name
+        else:
+            backends['default'] = item
+    return backends
@@ -3,18 +3,291 @@ Optimized Data Processing Pipeline for Raia Drogasil Dashboard
 Fast loading with lazy evaluation and pre-aggregation
 """
 
+import os
+import sys
+import copy
+import json
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+from compute_backends import get_compute_backend, parse_backend_config
+from dimension_index import DimensionIndex
+from hll_sketch import HLL_PRECISION, hll_build, hll_merge, hll_estimate, to_bytes, from_bytes, hll_count
+from iqvia_cube import IqviaCube
+from pricing_cube import CUBE_ROLLUPS, TOP_LIST_DIMS, TOP_N_LISTED, PricingCube, top_k
+from result_cache import ResultCache, cached_result
+from store_bitmap import (bitmap_build, bitmap_merge, bitmap_or, bitmap_and, popcount,
+                          bitmap_distinct, bitmap_remap, bitmap_width, store_brick_dictionary)
+from zero_sales_index import ZERO_CELL_BYTES, ZERO_SALES_COLS, ZeroSalesIndex, ZeroSalesWriter
+
+# Colunas IQVIA usadas pelo dashboard
+IQVIA_REQUIRED_COLS = ['id_periodo', 'cd_produto', 'cd_filial', 'cd_brick',
+                       'share', 'venda_rd', 'venda_concorrente']
+
+# Colunas lidas para agregar: só medidas aditivas (share é derivado das vendas)
+IQVIA_AGG_SOURCE_COLS = ['id_periodo', 'cd_produto', 'cd_filial', 'cd_brick',
+                         'venda_rd', 'venda_concorrente']
+
+# Colunas de IQVIA agregado por (id_periodo, cd_produto)
+IQVIA_AGG_COLS = ['id_periodo', 'cd_produto', 'share', 'venda_rd', 'venda_concorrente',
+                  'cd_filial', 'cd_brick', 'hll_filial', 'hll_brick', 'bm_filial', 'bm_zero']
+
+# Colunas de bitmap de lojas (um bit por cd_filial do dicionário store_index)
+BITMAP_COLS = ['bm_filial', 'bm_zero']
+
+# Colunas de sketches HLL (lojas e bricks distintos aproximados)
+HLL_COLS = ['hll_filial', 'hll_brick']
+
+# Granularidades do agregado IQVIA, da mais fina para a mais grossa:
+# bitmap = sketches HLL + bitmaps de lojas, sketch = só HLL, count = só somas e contagens
+IQVIA_GRAINS = ['bitmap', 'sketch', 'count']
+IQVIA_GRAIN_COLS = {
+    'bitmap': IQVIA_AGG_COLS,
+    'sketch': [col for col in IQVIA_AGG_COLS if col not in BITMAP_COLS],
+    'count': [col for col in IQVIA_AGG_COLS if col not in BITMAP_COLS + HLL_COLS]
+}
+
+# Orçamento padrão no Streamlit Cloud quando RD_MEMORY_BUDGET não é definido
+CLOUD_MEMORY_BUDGET = "1GB"
+
+# Modelo de custo do loader (bytes): colunas numéricas por célula, objeto bytes
+# (ponteiro + cabeçalho) por sketch/bitmap, e linha bruta em pandas com temporários do groupby
+CELL_BASE_BYTES = 8 * 8
+BYTES_OBJECT_OVERHEAD = 8 + 33
+RAW_ROW_BYTES = len(IQVIA_AGG_SOURCE_COLS) * 8 * 2
+
+# Linhas por lote no modo streaming (~1M linhas ≈ 56MB para 7 colunas int64/float64)
+IQVIA_BATCH_SIZE = 1_000_000
+
+# Colunas de preços usadas pelo dashboard
+PRICING_REQUIRED_COLS = ['mes', 'rbv', 'qt_unidade_vendida', 'preco_medio',
+                         'produto', 'canal', 'neogrupo', 'uf']
+
+# Dimensões filtráveis (colunas de preços). No IQVIA agregado só existe o produto:
+# produto vira cd_produto e neogrupo vira a lista de produtos da categoria
+FILTER_DIMS = ['canal', 'uf', 'neogrupo', 'produto']
+
+# Dimensões sem equivalente no IQVIA: com esses filtros, share e venda zero são nacionais
+IQVIA_NATIONAL_DIMS = ['canal', 'uf']
+
+# Curva ABC: dimensões classificáveis, classes e limites padrão (% acumulado do valor)
+ABC_DIMS = ['produto', 'uf', 'neogrupo', 'canal']
+ABC_CLASSES = ['A', 'B', 'C']
+ABC_THRESHOLDS = (80, 95)
+
+# Simulação de cenários: segmentações, fração do catálogo tratada como "top" no
+# ajuste de mix e parâmetros dos cenários padrão (share em fração: 0.05 = +5pp)
+SCENARIO_DIMS = ['neogrupo', 'uf']
+SCENARIO_TOP_SHARE = 0.2
+SCENARIO_DEFAULTS = {'share_uplift': 0.05, 'zero_recovery': 0.5, 'mix_uplift': 0.2}
+
+# Cache colunar do Preço.csv (Arrow IPC, lido com memory-map)
+PRICING_COLUMNAR_FILE = "pricing_columnar.arrow"
+PRICING_COLUMNAR_VERSION = 3
+
+# Dataset IQVIA reorganizado por relayout_iqvia.py (particionado e ordenado)
+IQVIA_LAYOUT_DIR = "iqvia_dataset"
+IQVIA_LAYOUT_FILE = "_layout.json"
+IQVIA_LAYOUT_VERSION = 1
+
+# Cubo esparso loja x brick x produto (memory-mapped no diretório de cache)
+IQVIA_CUBE_DIR = "iqvia_cube"
+
+# Índice de venda zero por loja (um array por mês, memory-mapped; opt-in via RD_ZERO_SALES_INDEX)
+ZERO_INDEX_DIR = "zero_sales_index"
+
+# Snapshot em disco dos dados agregados; incrementar ao mudar o formato salvo
+CACHE_VERSION = 10
+CACHE_DIR_NAME = ".rd_cache"
+
+
+def parse_memory_size(value):
+    """Bytes of a size such as '1.5GB', '800MB' or '2000000' (binary units)"""
+    text = str(value).strip().upper().replace(' ', '')
+    for suffix, factor in (('TB', 1024 ** 4), ('GB', 1024 ** 3), ('MB', 1024 ** 2),
+                           ('KB', 1024), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(float(text))
+
+
+def format_memory_size(n_bytes):
+    """Human-readable size, e.g. '1.2 GB'"""
+    for unit, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024)):
+        if n_bytes >= factor:
+            return f"{n_bytes / factor:.1f} {unit}"
+    return f"{int(n_bytes)} B"
+
+
+# Teto de memória residente deste processo (só definido nos workers do loader)
+_worker_memory_limit = None
+
+
+def _limit_worker_memory(memory_mb):
+    """Set the resident-memory cap of a loader worker process
+
+    The cap is on RSS, checked between batches by _check_worker_memory, not
+    on the address space: RLIMIT_AS also counts the virtual reservations of
+    Arrow's allocator and makes pyarrow fail well below the real usage.
+    """
+    global _worker_memory_limit
+    _worker_memory_limit = int(memory_mb) * 1024 * 1024 if memory_mb else None
+
+
+def _resident_memory():
+    """Resident memory of this process in bytes (peak RSS where /proc is missing), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None  # Sem medição de memória nesta plataforma
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # KB no Linux, bytes no macOS
+
+
+def _check_worker_memory(file):
+    """Fail the worker with MemoryError once its RSS exceeds the cap (no-op without one)"""
+    if _worker_memory_limit is None:
+        return
+    rss = _resident_memory()
+    if rss is not None and rss > _worker_memory_limit:
+        raise MemoryError(
+            f"Worker IQVIA com {format_memory_size(rss)} residentes ao processar {Path(file).name} "
+            f"(limite {format_memory_size(_worker_memory_limit)}): use streaming, lotes menores "
+            f"ou aumente RD_IQVIA_WORKER_MEMORY_MB")
+
+
+def weighted_share(venda_rd, venda_concorrente):
+    """Volume-weighted RD share: sum(venda_rd) / sum(venda_rd + venda_concorrente)
+
+    Works on scalars or aligned Series/arrays of already-summed sales; 0 where
+    there is no market volume.
+    """
+    venda_rd = np.asarray(venda_rd, dtype=np.float64)
+    total = venda_rd + np.asarray(venda_concorrente, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(total > 0, venda_rd / total, 0.0)
+    return share if share.ndim else float(share)
+
+
+def weighted_price(rbv, units):
+    """Unit-weighted average price: sum(rbv) / sum(units)
+
+    Works on scalars or aligned Series/arrays of already-summed measures; 0
+    where no units were sold.
+    """
+    rbv = np.asarray(rbv, dtype=np.float64)
+    units = np.asarray(units, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price = np.where(units > 0, rbv / units, 0.0)
+    return price if price.ndim else float(price)
+
+
+def _filter_values(values):
+    """Tuple of filter values from a single value or a list of values"""
+    if isinstance(values, (str, int, np.integer)):
+        values = [values]
+    return tuple(values)
+
+
+def month_offsets(values):
+    """Months and row offsets of a month-sorted datetime64 array
+
+    Rows of months[i] are offsets[i]:offsets[i + 1].
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return values[:0], np.zeros(1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return values[starts], np.r_[starts, len(values)]
+
+
+def _isin_expression(column, values):
+    """Equality / membership predicate on a dataset column"""
+    values = np.unique(np.atleast_1d(values))
+    if len(values) == 1:
+        return ds.field(column) == values[0].item()
+    return ds.field(column).isin(values.tolist())
+
+
+def iqvia_filter_expression(periods=None, products=None, stores=None, bricks=None):
+    """Pushdown filter over id_periodo, cd_produto, cd_filial and cd_brick
+
+    periods is a (first, last) YYYYMM range or a list of periods; the other
+    arguments are codes or lists of codes. Returns None when nothing is filtered.
+    """
+    conditions = []
+    if periods is not None:
+        if isinstance(periods, tuple) and len(periods) == 2:
+            conditions.append((ds.field('id_periodo') >= int(periods[0])) &
+                              (ds.field('id_periodo') <= int(periods[1])))
+        else:
+            conditions.append(_isin_expression('id_periodo', periods))
+    for column, values in (('cd_produto', products), ('cd_filial', stores), ('cd_brick', bricks)):
+        if values is not None:
+            conditions.append(_isin_expression(column, values))
+
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def _aggregate_iqvia_month(file, streaming=False, batch_size=IQVIA_BATCH_SIZE, grain='bitmap',
+                           zero_dir=None):
+    """Aggregate one IQVIA month file; module-level so worker processes can run it
+
+    Returns the aggregate, the sorted store dictionary its bitmaps are built on,
+    the brick of each of those stores and, when zero_dir is given, the month's
+    number of zero-sales cells written there from the same read of the file
+    (None otherwise).
+    """
+    writer = None
+    if zero_dir is not None:
+        writer = OptimizedDataProcessor._zero_sales_writer(file, zero_dir, streaming, batch_size)
+
+    if streaming:
+        stores, store_bricks = OptimizedDataProcessor._file_store_dictionary(file, batch_size)
+        df_agg = OptimizedDataProcessor._aggregate_iqvia_file_streaming(
+            file, stores, batch_size, grain, writer)
+        return df_agg, stores, store_bricks, writer.close() if writer is not None else None
+
+    df = pd.read_parquet(file, columns=IQVIA_AGG_SOURCE_COLS)
+    _check_worker_memory(file)
+    stores, store_bricks = store_brick_dictionary(df['cd_filial'].to_numpy(), df['cd_brick'].to_numpy())
+    if writer is not None:
+        writer.add(df)
+
+    # Agregar imediatamente para reduzir memória
+    df_agg = OptimizedDataProcessor._aggregate_iqvia_frame(df, stores, grain)
+    del df  # Liberar memória imediatamente
+    return df_agg, stores, store_bricks, writer.close() if writer is not None else None
+
 
 class OptimizedDataProcessor:
     """Optimized data processing class with lazy loading"""
 
-    def __init__(self, data_dir="."):
+    def __init__(self, data_dir=".", backend=None):
         self.data_dir = Path(data_dir)
         self.iqvia_data = None
         self.pricing_data = None
@@ -22,179 +295,1147 @@ class OptimizedDataProcessor:
         self.pricing_aggregated = None
         self.date_filter_start = None
         self.date_filter_end = None
+        self.dimension_filters = {}
+        self.iqvia_month_cap = None
+        self.iqvia_grain = 'bitmap'
+        self.iqvia_load_plan = None
+        self.store_index = None
+        self.store_bricks = None  # Brick de cada loja de store_index
+        self.zero_sales_index = None
+        self.iqvia_cube = None
+        self.view_of = None  # Processador de origem de uma view (with_filters)
+        self.pricing_cube = None
+        self._time_indexes = {}
+        self._dimension_indexes = {}
+        self._selections = {}
+        self.cache_dir = Path(os.getenv('RD_CACHE_DIR', self.data_dir / CACHE_DIR_NAME))
+        # Índice de venda zero por loja (em disco, ~12 bytes por célula): só sob demanda
+        self.zero_sales_enabled = os.getenv('RD_ZERO_SALES_INDEX', 'false').lower() == 'true'
+        # Backend de cálculo por getter, ex.: RD_COMPUTE_BACKEND="pandas,get_top_products=polars"
+        self.pricing_prefix = os.getenv('RD_PRICING_PREFIX', 'true').lower() == 'true'
+        self.compute_backends = parse_backend_config(
+            backend if backend is not None else os.getenv('RD_COMPUTE_BACKEND'))
+        self._backend_instances = {}
+        # Cache de resultados dos getters; data_version muda a cada carga de dados
+        self.data_version = 0
+        self.result_cache = None
+        if os.getenv('RD_RESULT_CACHE', 'true').lower() == 'true':
+            self.result_cache = ResultCache(
+                max_entries=int(os.getenv('RD_RESULT_CACHE_ENTRIES', '256')),
+                max_bytes=int(float(os.getenv('RD_RESULT_CACHE_MB', '64')) * 1024 * 1024),
+                ttl=float(os.getenv('RD_RESULT_CACHE_TTL', '300'))
+            )
+
+    @staticmethod
+    def _convert_pricing_csv(pricing_file):
+        """Parse Preço.csv with the multithreaded Arrow reader into a compact typed table
+
+        Low-cardinality strings become dictionaries (categoricals) with sorted
+        categories, so groupings stay alphabetical; integers are downcast to
+        int32 and preco_medio to float32 where the values fit; rbv stays
+        float64 because it is summed into large totals.
+        """
+        table = pa_csv.read_csv(
+            pricing_file,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=PRICING_REQUIRED_COLS,
+                column_types={'mes': pa.timestamp('ns'), 'rbv': pa.float64()},
+                timestamp_parsers=['%Y-%m-%d']
+            )
+        )
+
+        # Filtrar de janeiro/2025 até 30/09/2025
+        mes = table.column('mes')
+        table = table.filter(pc.and_(
+            pc.greater_equal(mes, pa.scalar(pd.Timestamp('2025-01-01'), pa.timestamp('ns'))),
+            pc.less_equal(mes, pa.scalar(pd.Timestamp('2025-09-30'), pa.timestamp('ns')))
+        ))
+
+        target_types = {
+            'uf': pa.dictionary(pa.int8(), pa.string()),
+            'canal': pa.dictionary(pa.int8(), pa.string()),
+            'neogrupo': pa.dictionary(pa.int8(), pa.string()),
+            'produto': pa.int32(),
+            'qt_unidade_vendida': pa.int32(),
+            'preco_medio': pa.float32()
+        }
+        for name, target in target_types.items():
+            index = table.schema.get_field_index(name)
+            column = table.column(index)
+            try:
+                if pa.types.is_dictionary(target):
+                    # Categorias em ordem alfabética (não na ordem de aparição no CSV)
+                    categories = pc.drop_null(pc.unique(column))
+                    categories = categories.take(pc.sort_indices(categories))
+                    indices = pc.index_in(column, value_set=categories).combine_chunks()
+                    converted = pa.DictionaryArray.from_arrays(
+                        indices.cast(target.index_type), categories).cast(target)
+                elif pa.types.is_floating(target):
+                    converted = column.cast(target, safe=False)
+                else:
+                    converted = column.cast(target)  # safe: falha se não couber
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue  # Mantém o tipo original
+            table = table.set_column(index, name, converted)
+
+        # Ordenado por mês: filtros de data viram fatias (ver _filter_rows)
+        return table.sort_by('mes')
+
+    def _load_pricing_columnar(self, pricing_file):
+        """Load pricing from the memory-mapped columnar cache, converting the CSV once"""
+        cache_file = self.cache_dir / PRICING_COLUMNAR_FILE
+
+        if cache_file.exists():
+            table = feather.read_table(cache_file, memory_map=True)
+            saved = json.loads((table.schema.metadata or {}).get(b'rd_source', b'{}'))
+            if (saved.get('version') == PRICING_COLUMNAR_VERSION
+                    and self._fingerprint_matches(pricing_file, saved.get('fingerprint'))):
+                return table.to_pandas()
+
+        table = self._convert_pricing_csv(pricing_file)
+        source = {'version': PRICING_COLUMNAR_VERSION, 'fingerprint': self._file_fingerprint(pricing_file)}
+        table = table.replace_schema_metadata({b'rd_source': json.dumps(source).encode()})
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        feather.write_feather(table, tmp_file, compression='uncompressed')
+        os.replace(tmp_file, cache_file)
+        return table.to_pandas()
+
+    def load_pricing_data_fast(self, load_all=True, columnar=None):
+        """Load pricing data - much smaller, loads quickly
+
+        With columnar (default RD_PRICING_COLUMNAR, on) the CSV is parsed once into
+        a typed Arrow file in the cache directory and memory-mapped afterwards.
+        """
+        if columnar is None:
+            columnar = os.getenv('RD_PRICING_COLUMNAR', 'true').lower() == 'true'
 
-    def load_pricing_data_fast(self, load_all=True):
-        """Load pricing data - much smaller, loads quickly"""
         pricing_file = self.data_dir / "Preço.csv"
         print("Carregando dados de preços...")
 
-        # Ler apenas colunas necessárias para acelerar
-        required_cols = ['mes', 'rbv', 'qt_unidade_vendida', 'preco_medio',
-                        'produto', 'canal', 'neogrupo', 'uf']
-        self.pricing_data = pd.read_csv(pricing_file, encoding='utf-8', usecols=required_cols)
-        self.pricing_data['mes'] = pd.to_datetime(self.pricing_data['mes'])
-
-        # Filtrar de janeiro/2025 até 30/09/2025
-        start_date = pd.Timestamp('2025-01-01')
-        cutoff_date = pd.Timestamp('2025-09-30')
-        self.pricing_data = self.pricing_data[
-            (self.pricing_data['mes'] >= start_date) &
-            (self.pricing_data['mes'] <= cutoff_date)
-        ]
+        if columnar:
+            self.pricing_data = self._load_pricing_columnar(pricing_file)
+        else:
+            # Ler apenas colunas necessárias para acelerar
+            self.pricing_data = pd.read_csv(pricing_file, encoding='utf-8', usecols=PRICING_REQUIRED_COLS)
+            self.pricing_data['mes'] = pd.to_datetime(self.pricing_data['mes'], format='%Y-%m-%d')
+
+            # Filtrar de janeiro/2025 até 30/09/2025
+            start_date = pd.Timestamp('2025-01-01')
+            cutoff_date = pd.Timestamp('2025-09-30')
+            self.pricing_data = self.pricing_data[
+                (self.pricing_data['mes'] >= start_date) &
+                (self.pricing_data['mes'] <= cutoff_date)
+            ]
+        self.pricing_data = self._sort_by_month(self.pricing_data, 'mes')
+        self.pricing_cube = None
+        self.pricing_aggregated = None
+        self._invalidate_results()
 
         print(f"✓ Preços carregados: {len(self.pricing_data):,} registros (Jan-Set/2025)")
         return self.pricing_data
 
-    def load_iqvia_all(self):
-        """Load ALL IQVIA data from Jan-Aug 2025 with memory-efficient aggregation"""
+    def _iqvia_month_files(self, max_months=None):
+        """List the 2025 IQVIA monthly files, optionally keeping only the last N months"""
         iqvia_files = sorted(self.data_dir.glob("historico_iqvia_*.parquet"))
 
-        # Check if running in cloud environment (limited memory)
-        import os
-        cloud_mode = os.getenv('STREAMLIT_CLOUD', 'false').lower() == 'true'
-        max_months = 3 if cloud_mode else 9  # Limit to 3 months in cloud
-
-        print(f"Carregando IQVIA ({'últimos %d meses' % max_months if cloud_mode else 'TODOS os meses de 2025'} com agregação)...")
-
-        # Ler apenas colunas necessárias
-        required_cols = ['id_periodo', 'cd_produto', 'cd_filial', 'cd_brick',
-                        'share', 'venda_rd', 'venda_concorrente']
-
-        # ESTRATÉGIA: Agregar cada arquivo antes de concatenar (economiza memória)
-        aggregated_dfs = []
-        files_loaded = 0
-
-        # Filtrar apenas arquivos de 2025
+        selected = []
         for file in iqvia_files:
             # Extrair ano/mês do nome do arquivo
-            filename = file.stem
-            period_str = filename.split('_')[-1]
+            period_str = file.stem.split('_')[-1]
 
             if len(period_str) == 6:  # YYYYMM format
                 year = int(period_str[:4])
                 month = int(period_str[4:])
 
-                # Carregar últimos N meses de 2025
+                # Carregar meses de 2025 até setembro
                 if year == 2025 and 1 <= month <= 9:
-                    # In cloud mode, only load recent months
-                    if cloud_mode and month <= (9 - max_months):
-                        continue  # Skip older months
-                    print(f"  - Processando {file.name}...")
-                    df = pd.read_parquet(file, columns=required_cols)
-
-                    # Agregar imediatamente para reduzir memória
-                    # Manter apenas agregações por período, produto, filial
-                    df_agg = df.groupby(['id_periodo', 'cd_produto']).agg({
-                        'share': 'mean',
-                        'venda_rd': 'sum',
-                        'venda_concorrente': 'sum',
-                        'cd_filial': 'nunique',
-                        'cd_brick': 'nunique'
-                    }).reset_index()
-
-                    aggregated_dfs.append(df_agg)
-                    files_loaded += 1
-                    del df  # Liberar memória imediatamente
-
-        if not aggregated_dfs:
-            print("⚠️  Nenhum arquivo IQVIA encontrado!")
-            return pd.DataFrame()
+                    # Apenas os últimos N meses quando houver limite
+                    if max_months is not None and month <= (9 - max_months):
+                        continue
+                    selected.append(file)
+        return selected
+
+    @staticmethod
+    def _file_store_dictionary(file, batch_size=IQVIA_BATCH_SIZE):
+        """Sorted distinct cd_filial of a file and the brick of each, read a batch at a time"""
+        stores = bricks = np.array([], dtype=np.int64)
+        dataset = ds.dataset(file, format='parquet')
+        for batch in dataset.to_batches(columns=['cd_filial', 'cd_brick'], batch_size=batch_size):
+            stores, bricks = store_brick_dictionary(
+                np.concatenate([stores, batch.column(0).to_numpy()]),
+                np.concatenate([bricks, batch.column(1).to_numpy()]))
+        return stores, bricks
+
+    @staticmethod
+    def _iqvia_cell_indexes(df, group_codes, n_groups, stores, grain='bitmap'):
+        """HLL sketches of stores/bricks and exact store bitmaps per group
+
+        bm_filial has the bit of every store that reports the product in the
+        month, bm_zero only of those where RD sold zero. Coarser grains skip the
+        bitmaps ('sketch') or both ('count').
+        """
+        indexes = {}
+        if grain == 'count':
+            return indexes
+
+        indexes['hll_filial'] = hll_build(df['cd_filial'].to_numpy(), group_codes, n_groups)
+        indexes['hll_brick'] = hll_build(df['cd_brick'].to_numpy(), group_codes, n_groups)
+        if grain == 'bitmap':
+            store_codes = np.searchsorted(stores, df['cd_filial'].to_numpy())
+            zero = df['venda_rd'].to_numpy() == 0
+            indexes['bm_filial'] = bitmap_build(store_codes, group_codes, n_groups, len(stores))
+            indexes['bm_zero'] = bitmap_build(store_codes[zero], group_codes[zero], n_groups, len(stores))
+        return indexes
+
+    @staticmethod
+    def _aggregate_iqvia_frame(df, stores=None, grain='bitmap'):
+        """Aggregate raw IQVIA rows to (id_periodo, cd_produto)
+
+        Besides the exact per-cell counts, each cell gets mergeable HLL sketches
+        (hll_filial, hll_brick) so distinct stores/bricks can be estimated at any
+        rollup level, and store bitmaps (bm_filial, bm_zero) over the sorted
+        store dictionary for exact coverage counts (see IQVIA_GRAINS). Only
+        additive measures are aggregated; share is derived from the summed sales.
+        """
+        if stores is None:
+            stores = np.unique(df['cd_filial'].to_numpy())
+
+        grouped = df.groupby(['id_periodo', 'cd_produto'])
+        result = grouped.agg({
+            'venda_rd': 'sum',
+            'venda_concorrente': 'sum',
+            'cd_filial': 'nunique',
+            'cd_brick': 'nunique'
+        }).reset_index()
+        result.insert(2, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+
+        sketches = OptimizedDataProcessor._iqvia_cell_indexes(
+            df, grouped.ngroup().to_numpy(), len(result), stores, grain)
+        for col, registers in sketches.items():
+            result[col] = to_bytes(registers)
+        return result
+
+    @staticmethod
+    def _merge_sketch_parts(parts):
+        """Union per-batch sketches/bitmaps [(keys, {col: registers})] into one set of keys"""
+        keys = parts[0][0].append([index for index, _ in parts[1:]]) if len(parts) > 1 else parts[0][0]
+        codes, uniques = keys.factorize()
+        merged = {}
+        for col in parts[0][1]:
+            merge = bitmap_merge if col in BITMAP_COLS else hll_merge
+            merged[col] = merge(np.concatenate([regs[col] for _, regs in parts]), codes, len(uniques))
+        return uniques, merged
+
+    @staticmethod
+    def _aggregate_iqvia_file_streaming(file, stores, batch_size=IQVIA_BATCH_SIZE, grain='bitmap',
+                                        zero_writer=None):
+        """Aggregate one IQVIA file batch by batch, keeping only one batch in memory
+
+        Sales are summed and share derived at the end, and each row is one store
+        of the product in the month, so the store count is the row count. Bricks are counted from
+        the distinct (id_periodo, cd_produto, cd_brick) triples seen so far, and
+        the HLL sketches and store bitmaps (over the file's store dictionary) of
+        each batch are merged by register-wise max / OR. Each batch's zero-sales
+        cells go to zero_writer when one is given.
+        """
+        keys = ['id_periodo', 'cd_produto']
+        dataset = ds.dataset(file, format='parquet')
+
+        partials = []
+        brick_pairs = []
+        sketch_parts = []
+        partial_rows = 0
+        for batch in dataset.to_batches(columns=IQVIA_AGG_SOURCE_COLS, batch_size=batch_size):
+            df = batch.to_pandas()
+
+            grouped = df.groupby(keys)
+            partial = grouped.agg(
+                venda_rd=('venda_rd', 'sum'),
+                venda_concorrente=('venda_concorrente', 'sum'),
+                cd_filial=('cd_filial', 'size')
+            )
+            partials.append(partial)
+            brick_pairs.append(df[keys + ['cd_brick']].drop_duplicates())
+            sketch_parts.append((partial.index, OptimizedDataProcessor._iqvia_cell_indexes(
+                df, grouped.ngroup().to_numpy(), len(partial), stores, grain)))
+            if zero_writer is not None:
+                zero_writer.add(df)
+            partial_rows += len(partial)
+            del df
+            _check_worker_memory(file)
+
+            # Compactar parciais quando o acumulado cresce demais
+            if partial_rows > batch_size:
+                partials = [pd.concat(partials).groupby(level=keys).sum()]
+                brick_pairs = [pd.concat(brick_pairs, ignore_index=True).drop_duplicates()]
+                sketch_parts = [OptimizedDataProcessor._merge_sketch_parts(sketch_parts)]
+                partial_rows = len(partials[0])
+
+        if not partials:
+            return pd.DataFrame(columns=IQVIA_GRAIN_COLS[grain])
+
+        result = pd.concat(partials).groupby(level=keys).sum()
+        bricks = pd.concat(brick_pairs, ignore_index=True).drop_duplicates().groupby(keys).size()
+        sketch_keys, sketches = OptimizedDataProcessor._merge_sketch_parts(sketch_parts)
+
+        result['share'] = weighted_share(result['venda_rd'], result['venda_concorrente'])
+        result['cd_brick'] = bricks.reindex(result.index).fillna(0).astype('int64')
+        positions = sketch_keys.get_indexer(result.index)
+        for col, registers in sketches.items():
+            result[col] = to_bytes(registers[positions])
+        result = result.reset_index()
+        return result[IQVIA_GRAIN_COLS[grain]]
+
+    @staticmethod
+    def _memory_budget():
+        """IQVIA loader budget in bytes from RD_MEMORY_BUDGET, or None for no limit
+
+        On Streamlit Cloud (limited memory) it defaults to CLOUD_MEMORY_BUDGET.
+        """
+        budget = os.getenv('RD_MEMORY_BUDGET')
+        if not budget and os.getenv('STREAMLIT_CLOUD', 'false').lower() == 'true':
+            budget = CLOUD_MEMORY_BUDGET
+        return parse_memory_size(budget) if budget else None
+
+    @staticmethod
+    def _iqvia_load_options(streaming=None, workers=None, worker_memory_mb=None):
+        """Resolve loader options from arguments and environment
+
+        streaming stays None when a memory budget is set and neither the
+        argument nor RD_IQVIA_STREAMING fixes it, so the planner can choose.
+        """
+        budget = OptimizedDataProcessor._memory_budget()
+        if streaming is None and os.getenv('RD_IQVIA_STREAMING'):
+            streaming = os.getenv('RD_IQVIA_STREAMING').lower() == 'true'
+        if streaming is None and budget is None:
+            streaming = False
+        if workers is None:
+            workers = int(os.getenv('RD_IQVIA_WORKERS', '1'))
+        if worker_memory_mb is None:
+            worker_memory_mb = int(os.getenv('RD_IQVIA_WORKER_MEMORY_MB', '0')) or None
+        return budget, streaming, workers, worker_memory_mb
+
+    @staticmethod
+    def _row_group_range(metadata, column):
+        """(min, max) of a column over all row groups from the footer statistics, or None"""
+        col = metadata.schema.names.index(column)
+        lows, highs = [], []
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(col).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            lows.append(stats.min)
+            highs.append(stats.max)
+        return (int(min(lows)), int(max(highs))) if lows else None
+
+    @staticmethod
+    def _zero_sales_writer(file, zero_dir, streaming=False, batch_size=IQVIA_BATCH_SIZE):
+        """Writer of a month's zero-sales cells into zero_dir
+
+        When streaming, cells are spilled to one product-range bucket per batch
+        of rows (ranges from the cd_produto row-group statistics), so sorting
+        them holds about a batch of cells at a time.
+        """
+        period = int(Path(file).stem.split('_')[-1])
+        if not streaming:
+            return ZeroSalesWriter(zero_dir, period)
+        metadata = pq.ParquetFile(file).metadata
+        buckets = -(-metadata.num_rows // batch_size)
+        return ZeroSalesWriter(zero_dir, period,
+                               OptimizedDataProcessor._row_group_range(metadata, 'cd_produto'), buckets)
+
+    @staticmethod
+    def _estimate_iqvia_month(file, batch_size=IQVIA_BATCH_SIZE, cells=None):
+        """Rows, aggregate cells and store code range of one month file, from its footer
+
+        Rows come from the footer and the store range from the cd_filial
+        row-group statistics. The cells (distinct products of the month) are
+        the count given by the caller when known, else bounded by the rows and
+        the width of the cd_produto range ('known' tells which).
+        """
+        metadata = pq.ParquetFile(file).metadata
+        rows = metadata.num_rows
+
+        store_range = OptimizedDataProcessor._row_group_range(metadata, 'cd_filial')
+        if store_range is None:
+            # Sem estatísticas: dicionário de lojas lido da coluna
+            stores, _ = OptimizedDataProcessor._file_store_dictionary(file, batch_size)
+            store_range = (int(stores[0]), int(stores[-1])) if len(stores) else (0, 0)
+
+        known = cells is not None
+        if not known:
+            product_range = OptimizedDataProcessor._row_group_range(metadata, 'cd_produto')
+            cells = rows if product_range is None else min(rows, product_range[1] - product_range[0] + 1)
+
+        return {'rows': rows, 'cells': int(cells), 'known': known,
+                'store_low': store_range[0], 'store_high': store_range[1]}
+
+    def _known_iqvia_cells(self, month_files):
+        """Aggregate cells per month file recorded in the current snapshot, for unchanged files"""
+        _, manifest = self._current_snapshot()
+        if manifest is None:
+            return {}
+        recorded = manifest.get('iqvia_cells', {})
+        return {file.name: recorded[file.name] for file in month_files
+                if file.name in recorded and self._fingerprint_matches(file, manifest['sources'].get(file.name))}
+
+    @staticmethod
+    def _calibrate_estimates(estimates):
+        """Bound the cells of unknown months by the largest cells/rows ratio of the known ones"""
+        ratios = [e['cells'] / e['rows'] for e in estimates if e['known'] and e['rows']]
+        if not ratios:
+            return estimates
+        ratio = max(ratios)
+        return [e if e['known'] else dict(e, cells=min(e['cells'], int(np.ceil(e['rows'] * ratio))))
+                for e in estimates]
+
+    @staticmethod
+    def _iqvia_plan_cost(estimates, grain, streaming, batch_size=IQVIA_BATCH_SIZE, workers=1):
+        """Estimated peak bytes of aggregating the given months at a grain
+
+        Resident: the per-month aggregates plus their concatenation. Transient:
+        the raw rows in pandas (one batch when streaming) and the cell indexes
+        of the months being aggregated at the same time.
+        """
+        if not estimates:
+            return 0
+        cell_bytes = CELL_BASE_BYTES
+        if grain in ('bitmap', 'sketch'):
+            cell_bytes += len(HLL_COLS) * (BYTES_OBJECT_OVERHEAD + (1 << HLL_PRECISION))
+        if grain == 'bitmap':
+            n_stores = max(e['store_high'] for e in estimates) - min(e['store_low'] for e in estimates) + 1
+            cell_bytes += len(BITMAP_COLS) * (BYTES_OBJECT_OVERHEAD + bitmap_width(n_stores))
+
+        resident = 2 * sum(e['cells'] for e in estimates) * cell_bytes
+        transient = max(
+            (min(e['rows'], batch_size) if streaming else e['rows']) * RAW_ROW_BYTES + e['cells'] * cell_bytes
+            for e in estimates
+        )
+        return resident + transient * max(1, min(workers, len(estimates)))
+
+    @staticmethod
+    def _zero_index_cost(estimates, streaming, batch_size=IQVIA_BATCH_SIZE, workers=1):
+        """Estimated extra peak bytes of writing the zero-sales index along the load
+
+        The index itself is memory-mapped, so only the cells being sorted count:
+        up to a month's rows (a batch when streaming) per worker, held with their
+        sort keys and sorted copy.
+        """
+        if not estimates:
+            return 0
+        rows = max(min(e['rows'], batch_size) if streaming else e['rows'] for e in estimates)
+        return 3 * rows * ZERO_CELL_BYTES * max(1, min(workers, len(estimates)))
+
+    def plan_iqvia_load(self, budget=None, streaming=None, batch_size=IQVIA_BATCH_SIZE, workers=1,
+                        zero_index=False):
+        """Pick the finest grain and longest month range whose estimated peak fits the budget
+
+        Every grain of IQVIA_GRAINS (finest first) is tried over all months, in
+        memory before streaming unless streaming is fixed; only when even the
+        coarsest grain does not fit are the oldest months dropped. With
+        zero_index the store-level zero-sales index is kept only if it still
+        fits on top of the chosen plan. Returns a dict with grain, files,
+        streaming, zero_index, estimated_bytes and budget.
+        """
+        month_files = self._iqvia_month_files()
+        plan = {'grain': IQVIA_GRAINS[0], 'files': month_files, 'streaming': bool(streaming),
+                'zero_index': bool(zero_index), 'estimated_bytes': None, 'budget': budget}
+        if budget is None or not month_files:
+            return plan
+
+        # Estimativas só do rodapé dos arquivos, calibradas pelas contagens do último snapshot
+        known = self._known_iqvia_cells(month_files)
+        estimates = self._calibrate_estimates([self._estimate_iqvia_month(file, batch_size, known.get(file.name))
+                                               for file in month_files])
+        plan = self._plan_iqvia_aggregate(plan, estimates, budget, streaming, batch_size, workers)
+        if zero_index:
+            kept = estimates[len(estimates) - len(plan['files']):]
+            cost = plan['estimated_bytes'] + self._zero_index_cost(kept, plan['streaming'], batch_size, workers)
+            plan = dict(plan, zero_index=cost <= budget,
+                        estimated_bytes=cost if cost <= budget else plan['estimated_bytes'])
+        return plan
+
+    def _plan_iqvia_aggregate(self, plan, estimates, budget, streaming, batch_size, workers):
+        """Grain, streaming mode and month range of plan_iqvia_load for the aggregate alone"""
+        month_files = plan['files']
+        modes = [streaming] if streaming is not None else [False, True]
+        for grain in IQVIA_GRAINS:
+            for mode in modes:
+                cost = self._iqvia_plan_cost(estimates, grain, mode, batch_size, workers)
+                if cost <= budget:
+                    return dict(plan, grain=grain, streaming=mode, estimated_bytes=cost)
+
+        # Nem a granularidade mais grossa cabe com todos os meses: descartar os mais antigos
+        grain, mode = IQVIA_GRAINS[-1], modes[-1]
+        for first in range(1, len(estimates)):
+            cost = self._iqvia_plan_cost(estimates[first:], grain, mode, batch_size, workers)
+            if cost <= budget or first == len(estimates) - 1:
+                return dict(plan, grain=grain, streaming=mode, files=month_files[first:],
+                            estimated_bytes=cost)
+        return dict(plan, grain=grain, streaming=mode,
+                    estimated_bytes=self._iqvia_plan_cost(estimates, grain, mode, batch_size, workers))
+
+    @staticmethod
+    def _relayout_bitmaps(df, old_stores, new_stores):
+        """Re-lay the store bitmap columns of df onto a larger store dictionary"""
+        if np.array_equal(old_stores, new_stores) or df.empty:
+            return df
+        df = df.copy()
+        for col in BITMAP_COLS:
+            if col in df.columns:
+                df[col] = to_bytes(bitmap_remap(from_bytes(df[col]), old_stores, new_stores))
+        return df
+
+    @staticmethod
+    def _load_iqvia_files(month_files, streaming=False, batch_size=IQVIA_BATCH_SIZE,
+                          workers=1, worker_memory_mb=None, grain='bitmap', zero_dir=None):
+        """Aggregate the given month files -> (frame with 'data', store dictionary, brick of
+        each store, zero-sales months)
+
+        Each month's bitmaps are re-laid onto the union of the months' stores.
+        With zero_dir each month's zero-sales cells are written there and the
+        months inside the loaded window are returned (None otherwise).
+        """
+        # ESTRATÉGIA: Agregar cada arquivo antes de concatenar (economiza memória)
+        workers = max(1, min(workers, len(month_files)))
+
+        if workers > 1:
+            # Cada mês é independente: um processo por arquivo, concat no final
+            print(f"  - Processando {len(month_files)} arquivos em {workers} processos...")
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_limit_worker_memory,
+                                     initargs=(worker_memory_mb,)) as executor:
+                results = list(executor.map(
+                    _aggregate_iqvia_month, month_files,
+                    [streaming] * len(month_files), [batch_size] * len(month_files),
+                    [grain] * len(month_files), [zero_dir] * len(month_files)
+                ))
+        else:
+            results = []
+            for file in month_files:
+                print(f"  - Processando {file.name}...")
+                results.append(_aggregate_iqvia_month(file, streaming, batch_size, grain, zero_dir))
+
+        if not results:
+            return pd.DataFrame(), np.array([], dtype=np.int64), np.array([], dtype=np.int64), None
+
+        stores, store_bricks = store_brick_dictionary(
+            np.concatenate([month_stores for _, month_stores, _, _ in results]),
+            np.concatenate([month_bricks for _, _, month_bricks, _ in results]))
+        aggregated_dfs = [OptimizedDataProcessor._relayout_bitmaps(df_agg, month_stores, stores)
+                          for df_agg, month_stores, _, _ in results]
+        del results
 
         # Concatenar agregações (muito menor que dados originais)
-        self.iqvia_data = pd.concat(aggregated_dfs, ignore_index=True)
+        iqvia_data = pd.concat(aggregated_dfs, ignore_index=True)
         del aggregated_dfs  # Liberar memória
 
-        self.iqvia_data['data'] = pd.to_datetime(
-            self.iqvia_data['id_periodo'].astype(str),
+        iqvia_data['data'] = pd.to_datetime(
+            iqvia_data['id_periodo'].astype(str),
             format='%Y%m'
         )
 
         # Filtrar dados de janeiro até 30/09/2025
         start_date = pd.Timestamp('2025-01-01')
         cutoff_date = pd.Timestamp('2025-09-30')
-        self.iqvia_data = self.iqvia_data[
-            (self.iqvia_data['data'] >= start_date) &
-            (self.iqvia_data['data'] <= cutoff_date)
-        ]
+
+        zero_periods = None
+        if zero_dir is not None:
+            first, last = start_date.year * 100 + start_date.month, cutoff_date.year * 100 + cutoff_date.month
+            zero_periods = [period for period in (int(file.stem.split('_')[-1]) for file in month_files)
+                            if first <= period <= last]
+        return iqvia_data[
+            (iqvia_data['data'] >= start_date) &
+            (iqvia_data['data'] <= cutoff_date)
+        ], stores, store_bricks, zero_periods
+
+    def load_iqvia_all(self, streaming=None, batch_size=IQVIA_BATCH_SIZE,
+                       workers=None, worker_memory_mb=None, zero_index=None):
+        """Load ALL IQVIA data from Jan-Aug 2025 with memory-efficient aggregation
+
+        With streaming=True each file is read in record batches and folded into the
+        running aggregate, so peak memory is one batch instead of one month. It
+        defaults to RD_IQVIA_STREAMING.
+
+        With a memory budget (RD_MEMORY_BUDGET, e.g. '1.5GB'; CLOUD_MEMORY_BUDGET
+        on Streamlit Cloud) plan_iqvia_load picks the grain, month range and
+        streaming mode that fit, preferring coarser aggregates over dropping months.
+
+        With workers > 1 (default RD_IQVIA_WORKERS) each month is aggregated in its
+        own process and the partial aggregates are concatenated; worker_memory_mb
+        (default RD_IQVIA_WORKER_MEMORY_MB) caps the resident memory of each
+        worker, checked between batches, failing the load with MemoryError.
+
+        With zero_index=True (default RD_ZERO_SALES_INDEX) the store-level
+        zero-sales index is written to the cache directory from the same reads,
+        if the planner finds room for it.
+        """
+        budget, streaming, workers, worker_memory_mb = self._iqvia_load_options(
+            streaming, workers, worker_memory_mb)
+        if zero_index is None:
+            zero_index = self.zero_sales_enabled
+
+        plan = self.plan_iqvia_load(budget, streaming, batch_size, workers, zero_index)
+        all_months = len(self._iqvia_month_files())
+        self.iqvia_load_plan = plan
+        self.iqvia_grain = plan['grain']
+        self.iqvia_month_cap = len(plan['files']) if len(plan['files']) < all_months else None
+        streaming = plan['streaming']
+
+        if budget is not None:
+            fits = plan['estimated_bytes'] <= budget
+            print(f"{'✓' if fits else '⚠️ '} Orçamento de memória {format_memory_size(budget)}: "
+                  f"granularidade '{plan['grain']}', {len(plan['files'])}/{all_months} meses, "
+                  f"{'streaming' if streaming else 'em memória'} "
+                  f"(pico estimado {format_memory_size(plan['estimated_bytes'])})")
+            if zero_index and not plan['zero_index']:
+                print("⚠️  Índice de venda zero por loja não cabe no orçamento - não será construído")
+
+        print(f"Carregando IQVIA ({'últimos %d meses' % self.iqvia_month_cap if self.iqvia_month_cap else 'TODOS os meses de 2025'} "
+              f"com agregação{' em streaming' if streaming else ''})...")
+
+        # Índice de venda zero escrito num diretório temporário e publicado de uma vez
+        staging = None
+        if plan['zero_index']:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix=".tmp-zero-", dir=self.cache_dir))
+        try:
+            iqvia_data, stores, store_bricks, zero_periods = self._load_iqvia_files(
+                plan['files'], streaming, batch_size, workers, worker_memory_mb, plan['grain'], staging)
+            if staging is not None:
+                ZeroSalesIndex.publish(staging, self.cache_dir / ZERO_INDEX_DIR, zero_periods)
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+        zero_index = ZeroSalesIndex.load(self.cache_dir / ZERO_INDEX_DIR) if staging is not None else None
+
+        if iqvia_data.empty:
+            print("⚠️  Nenhum arquivo IQVIA encontrado!")
+            return pd.DataFrame()
+        self.iqvia_data = self._sort_by_month(iqvia_data, 'data')
+        self.store_index = stores
+        self.store_bricks = store_bricks
+        self.zero_sales_index = zero_index
+        self._invalidate_results()
 
         # Identificar período real de dados
         min_month = self.iqvia_data['data'].min().strftime('%b')
         max_month = self.iqvia_data['data'].max().strftime('%b')
         print(f"✓ IQVIA carregado e agregado: {len(self.iqvia_data):,} registros ({min_month}-{max_month}/2025)")
         print(f"  Produtos únicos: {self.iqvia_data['cd_produto'].nunique():,}")
+        if zero_index is not None:
+            print(f"✓ Índice de venda zero por loja: {zero_index.n_cells:,} células "
+                  f"({format_memory_size(zero_index.nbytes)} em disco, memory-mapped)")
         return self.iqvia_data
 
-    def precompute_aggregations(self):
-        """Pre-compute common aggregations for faster queries"""
-        print("Pré-computando agregações...")
+    def _iqvia_layout(self):
+        """Metadata of the re-laid-out IQVIA dataset if it is current, else None"""
+        layout_file = self.data_dir / IQVIA_LAYOUT_DIR / IQVIA_LAYOUT_FILE
+        if not layout_file.exists():
+            return None
+        with open(layout_file, encoding='utf-8') as f:
+            layout = json.load(f)
 
-        # IQVIA aggregations
+        current = {file.name: self._file_fingerprint(file, with_hash=False)
+                   for file in self._iqvia_month_files()}
+        if layout.get('version') != IQVIA_LAYOUT_VERSION or layout.get('sources') != current:
+            return None
+        return layout
+
+    def iqvia_dataset(self):
+        """Arrow dataset over the raw IQVIA data
+
+        Prefers the partitioned, product-sorted layout written by
+        relayout_iqvia.py when it is up to date with the month files.
+        """
+        layout = self._iqvia_layout()
+        if layout is None:
+            return ds.dataset(self._iqvia_month_files(), format='parquet')
+
+        fields = [('id_periodo', pa.int64())]
+        if layout['buckets'] > 1:
+            fields.append(('cd_brick_bucket', pa.int32()))
+        return ds.dataset(self.data_dir / IQVIA_LAYOUT_DIR, format='parquet',
+                          partitioning=ds.partitioning(pa.schema(fields), flavor='hive'))
+
+    def _date_filter_periods(self):
+        """Active date filter as an inclusive (YYYYMM, YYYYMM) range, or None"""
+        if self.date_filter_start is None or self.date_filter_end is None:
+            return None
+        return (self.date_filter_start.year * 100 + self.date_filter_start.month,
+                self.date_filter_end.year * 100 + self.date_filter_end.month)
+
+    def scan_iqvia(self, periods=None, products=None, stores=None, bricks=None, columns=None):
+        """Read raw IQVIA rows matching the filters, pushing them down to the scan
+
+        Predicates on id_periodo, cd_produto, cd_filial and cd_brick are checked
+        against row-group statistics, so only matching row groups are decoded.
+        periods defaults to the active date filter, and products is narrowed by
+        the active produto/neogrupo filters.
+        """
+        if periods is None:
+            periods = self._date_filter_periods()
+        products = self._filter_products(products)
+
+        expression = iqvia_filter_expression(periods, products, stores, bricks)
+
+        # Layout com buckets por brick: podar diretórios inteiros
+        layout = self._iqvia_layout()
+        if bricks is not None and layout is not None and layout['buckets'] > 1:
+            bucket_filter = _isin_expression('cd_brick_bucket', np.atleast_1d(bricks) % layout['buckets'])
+            expression = bucket_filter if expression is None else expression & bucket_filter
+
+        table = self.iqvia_dataset().to_table(columns=columns or IQVIA_REQUIRED_COLS,
+                                              filter=expression)
+        return table.to_pandas()
+
+    @cached_result
+    def get_iqvia_drilldown(self, products=None, stores=None, bricks=None, by='cd_brick'):
+        """Raw-granularity IQVIA view by month and store/brick (com filtro de data)
+
+        Reads only the rows of the requested products/stores/bricks from the
+        parquet files; nothing has to be preloaded.
+        """
+        df = self.scan_iqvia(products=products, stores=stores, bricks=bricks)
+        if df.empty:
+            return pd.DataFrame()
+
+        result = df.groupby(['id_periodo', by]).agg(
+            venda_rd=('venda_rd', 'sum'),
+            venda_concorrente=('venda_concorrente', 'sum'),
+            produtos=('cd_produto', 'nunique')
+        ).reset_index()
+        result.insert(2, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+        result['data'] = pd.to_datetime(result['id_periodo'].astype(str), format='%Y%m')
+        return result
+
+    def load_iqvia_cube(self, rebuild=False, batch_size=IQVIA_BATCH_SIZE):
+        """Build (once) and memory-map the sparse store x brick x product cube
+
+        The cube keeps the geography that the (id_periodo, cd_produto) aggregate
+        drops, with int32 sales and small integer codes. It is rebuilt when the
+        month files change.
+        """
+        cube_dir = self.cache_dir / IQVIA_CUBE_DIR
+        month_files = self._iqvia_month_files()
+        sources = {file.name: self._file_fingerprint(file, with_hash=False) for file in month_files}
+
+        meta = IqviaCube.read_meta(cube_dir)
+        if rebuild or meta is None or meta.get('sources') != sources:
+            print("Construindo cubo IQVIA loja x brick x produto...")
+            IqviaCube.build(month_files, batch_size).save(cube_dir, sources)
+
+        # Só um cubo substituído pode ter deixado resultados em cache
+        replaced = self.iqvia_cube is not None
+        self.iqvia_cube = IqviaCube.load(cube_dir)
+        if replaced:
+            self._invalidate_results()
+        print(f"✓ Cubo IQVIA: {len(self.iqvia_cube.periods)} meses, "
+              f"{self.iqvia_cube.nbytes / 1e6:,.0f} MB mapeados")
+        return self.iqvia_cube
+
+    def get_geo_share(self, level='cd_brick', products=None, stores=None, bricks=None):
+        """Brick- or store-level (level='cd_filial') share from the IQVIA cube (com filtro de data)
+
+        The cube is loaded on first use, on the origin processor of a view so
+        that every view shares it, and before the cached lookup.
+        """
+        if self.iqvia_cube is None:
+            origin = self.view_of or self
+            if origin.iqvia_cube is None:
+                origin.load_iqvia_cube()
+            self.iqvia_cube = origin.iqvia_cube
+        return self._geo_share(level, products, stores, bricks)
+
+    @cached_result
+    def _geo_share(self, level, products, stores, bricks):
+        result = self.iqvia_cube.sales_by(level, periods=self._date_filter_periods(),
+                                          stores=stores, bricks=bricks,
+                                          products=self._filter_products(products))
+        if result.empty:
+            return pd.DataFrame()
+
+        result.insert(1, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+        result = result.sort_values('venda_concorrente', ascending=False, ignore_index=True)
+        return result
+
+    @staticmethod
+    def _iqvia_aggregations(df):
+        """IQVIA rollups by period and product from (id_periodo, cd_produto) rows
+
+        All rollups hold additive columns only (sales sums and cell counts) and
+        derive share as the volume-weighted ratio, so months can be added or
+        removed later by summing or subtracting their contribution.
+        """
+        by_period = df.groupby('data').agg({
+            'venda_rd': 'sum',
+            'venda_concorrente': 'sum',
+            'cd_produto': 'nunique'
+        }).reset_index()
+        by_period.insert(1, 'share', weighted_share(by_period['venda_rd'], by_period['venda_concorrente']))
+
+        by_product = df.groupby('cd_produto').agg(
+            venda_rd=('venda_rd', 'sum'),
+            venda_concorrente=('venda_concorrente', 'sum'),
+            meses=('data', 'size')
+        ).reset_index()
+        by_product.insert(1, 'share', weighted_share(by_product['venda_rd'], by_product['venda_concorrente']))
+
+        return {
+            'by_period': by_period,
+
+            'by_product': by_product,
+
+            'zero_sales': df[df['venda_rd'] == 0].groupby('cd_produto').agg({
+                'venda_concorrente': 'sum',
+                'cd_filial': 'sum'  # Já é count agregado
+            }).reset_index()
+        }
+
+    def _merge_iqvia_aggregations(self, removed_rows, added_rows):
+        """Update iqvia_aggregated with the months in removed_rows/added_rows only"""
+        removed = self._iqvia_aggregations(removed_rows)
+        added = self._iqvia_aggregations(added_rows)
+        current = self.iqvia_aggregated
+
+        # by_period: meses são independentes, basta substituir as linhas
+        stale = set(removed_rows['data']) | set(added_rows['data'])
+        by_period = current['by_period']
+        by_period = pd.concat([by_period[~by_period['data'].isin(stale)], added['by_period']],
+                              ignore_index=True).sort_values('data', ignore_index=True)
+
+        merged = {'by_period': by_period}
+        for name, additive, key_col in (
+            ('by_product', ['venda_rd', 'venda_concorrente', 'meses'], 'meses'),
+            ('zero_sales', ['venda_concorrente', 'cd_filial'], 'cd_filial'),
+        ):
+            base = current[name].set_index('cd_produto')[additive]
+            result = (base
+                      .sub(removed[name].set_index('cd_produto')[additive], fill_value=0)
+                      .add(added[name].set_index('cd_produto')[additive], fill_value=0))
+            result = result[result[key_col] > 0].astype(base.dtypes.to_dict()).reset_index()
+            merged[name] = result
+
+        by_product = merged['by_product']
+        by_product.insert(1, 'share', weighted_share(by_product['venda_rd'], by_product['venda_concorrente']))
+        self.iqvia_aggregated = merged
+
+    def ingest_iqvia_months(self, month_files, stale_periods=(), streaming=None,
+                            batch_size=IQVIA_BATCH_SIZE, workers=None, worker_memory_mb=None):
+        """Aggregate only the given month files and fold them into the loaded data
+
+        Rows of the files' months and of stale_periods (e.g. deleted files) are
+        replaced, and by_period/by_product/zero_sales and the store-level
+        zero-sales index are updated from the delta instead of being recomputed
+        from all months.
+        """
+        _, streaming, workers, worker_memory_mb = self._iqvia_load_options(
+            streaming, workers, worker_memory_mb)
+
+        # Meses novos escritos direto no índice de venda zero (substituição atômica por mês)
+        zero_dir = self.zero_sales_index.path if self.zero_sales_index is not None else None
+        if zero_dir is not None:
+            ZeroSalesIndex.invalidate(zero_dir)
+
+        # Meses novos na mesma granularidade do que já está carregado
+        added_rows, added_stores, added_bricks, zero_periods = self._load_iqvia_files(
+            list(month_files), bool(streaming), batch_size, workers, worker_memory_mb, self.iqvia_grain,
+            zero_dir)
+        stale = set(stale_periods) | {int(file.stem.split('_')[-1]) for file in month_files}
+
+        # Lojas novas ampliam o dicionário: reorganizar bitmaps existentes
+        stores, store_bricks = store_brick_dictionary(np.concatenate([self.store_index, added_stores]),
+                                                      np.concatenate([self.store_bricks, added_bricks]))
+        self.iqvia_data = self._relayout_bitmaps(self.iqvia_data, self.store_index, stores)
+        added_rows = self._relayout_bitmaps(added_rows, added_stores, stores)
+        self.store_index, self.store_bricks = stores, store_bricks
+
+        stale_mask = self.iqvia_data['id_periodo'].isin(stale)
+        removed_rows = self.iqvia_data[stale_mask]
+        if added_rows.empty:
+            added_rows = removed_rows.iloc[:0]
+
+        self.iqvia_data = pd.concat([self.iqvia_data[~stale_mask], added_rows], ignore_index=True)
+        self.iqvia_data = self.iqvia_data.sort_values(['id_periodo', 'cd_produto'], ignore_index=True)
+        self._merge_iqvia_aggregations(removed_rows, added_rows)
+        if zero_dir is not None:
+            periods = (set(self.zero_sales_index.periods) - stale) | set(zero_periods)
+            ZeroSalesIndex.update(zero_dir, periods, stale)
+            self.zero_sales_index = ZeroSalesIndex.load(zero_dir)
+        self._invalidate_results()
+
+        print(f"✓ IQVIA incremental: {len(month_files)} arquivo(s) novo(s)/alterado(s), "
+              f"{len(stale) - len(month_files)} mês(es) removido(s)")
+        return self.iqvia_data
+
+    def _precompute_iqvia_aggregations(self):
+        """Pre-compute IQVIA aggregations"""
         if self.iqvia_data is not None:
-            self.iqvia_aggregated = {
-                'by_period': self.iqvia_data.groupby('data').agg({
-                    'share': 'mean',
-                    'venda_rd': 'sum',
-                    'venda_concorrente': 'sum',
-                    'cd_produto': 'nunique'
-                }).reset_index(),
-
-                'by_product': self.iqvia_data.groupby('cd_produto').agg({
-                    'share': 'mean',
-                    'venda_rd': 'sum',
-                    'venda_concorrente': 'sum'
-                }).reset_index(),
-
-                'zero_sales': self.iqvia_data[self.iqvia_data['venda_rd'] == 0].groupby('cd_produto').agg({
-                    'venda_concorrente': 'sum',
-                    'cd_filial': 'nunique'
-                }).reset_index()
-            }
+            self.iqvia_aggregated = self._iqvia_aggregations(self.iqvia_data)
+            self._invalidate_results()
 
-        # Pricing aggregations
+    def _precompute_pricing_aggregations(self):
+        """Pre-compute pricing aggregations (monthly cube and its rollups)"""
         if self.pricing_data is not None:
-            self.pricing_aggregated = {
-                'by_month': self.pricing_data.groupby('mes').agg({
-                    'rbv': 'sum',
-                    'qt_unidade_vendida': 'sum',
-                    'preco_medio': 'mean'
-                }).reset_index(),
-
-                'by_channel': self.pricing_data.groupby('canal').agg({
-                    'rbv': 'sum',
-                    'qt_unidade_vendida': 'sum',
-                    'preco_medio': 'mean'
-                }).reset_index(),
-
-                'by_category': self.pricing_data.groupby('neogrupo').agg({
-                    'rbv': 'sum',
-                    'qt_unidade_vendida': 'sum',
-                    'preco_medio': 'mean',
-                    'produto': 'nunique'
-                }).reset_index(),
-
-                'by_state': self.pricing_data.groupby('uf').agg({
-                    'rbv': 'sum',
-                    'qt_unidade_vendida': 'sum',
-                    'preco_medio': 'mean'
-                }).reset_index()
-            }
+            self.pricing_cube = PricingCube.build(self.pricing_data)
+            self.pricing_aggregated = self.pricing_cube.tables
+            self._invalidate_results()
+
+            # O cubo completo tem a granularidade do Preço.csv; os rollups é que são menores
+            cells = len(self.pricing_cube.tables['cube'])
+            rollup_cells = sum(len(df) for name, df in self.pricing_cube.tables.items() if name != 'cube')
+            print(f"✓ Cubo de preços: {cells:,} células para {len(self.pricing_data):,} registros, "
+                  f"rollups com {rollup_cells:,} células ({format_memory_size(self.pricing_cube.nbytes)})")
+
+    def _pricing_rollup(self, columns):
+        """Smallest pricing cube rollup with the given columns, building the cube if needed"""
+        if self.pricing_cube is None:
+            if self.pricing_data is None:
+                return None
+            # Mesmos resultados que os dados brutos: não invalida o cache de resultados
+            self.pricing_cube = PricingCube.build(self.pricing_data)
+            self.pricing_aggregated = self.pricing_cube.tables
+        return self.pricing_cube.rollup(columns)
 
+    def precompute_aggregations(self):
+        """Pre-compute common aggregations for faster queries"""
+        print("Pré-computando agregações...")
+        self._precompute_iqvia_aggregations()
+        self._precompute_pricing_aggregations()
         print("✓ Agregações pré-computadas")
 
-    def quick_load(self):
-        """Load ALL available data from 2025"""
+    def _source_files(self):
+        """Source files the aggregated data is built from"""
+        return [self.data_dir / "Preço.csv"] + self._iqvia_month_files()
+
+    @staticmethod
+    def _file_fingerprint(file, with_hash=True):
+        """Size, mtime and a sha256 over the head and tail 1MB of a file"""
+        stat = file.stat()
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if with_hash:
+            chunk = 1024 * 1024
+            digest = hashlib.sha256(str(stat.st_size).encode())
+            with open(file, 'rb') as f:
+                digest.update(f.read(chunk))
+                if stat.st_size > chunk:
+                    f.seek(max(chunk, stat.st_size - chunk))
+                    digest.update(f.read(chunk))
+            fingerprint['sha256'] = digest.hexdigest()
+        return fingerprint
+
+    def _fingerprint_matches(self, file, saved):
+        """Check a file against a saved fingerprint
+
+        Size and mtime decide quickly; the hash is only recomputed when the mtime
+        moved, so a copied or touched file with the same content stays valid.
+        """
+        if not saved:
+            return False
+        current = self._file_fingerprint(file, with_hash=False)
+        if current['size'] != saved['size']:
+            return False
+        if current['mtime_ns'] != saved['mtime_ns']:
+            return self._file_fingerprint(file)['sha256'] == saved['sha256']
+        return True
+
+    def _changed_sources(self, saved_sources):
+        """Compare saved fingerprints with the current sources -> (changed, removed)"""
+        current_files = {file.name: file for file in self._source_files() if file.exists()}
+        removed = [name for name in saved_sources if name not in current_files]
+
+        changed = [file for name, file in current_files.items()
+                   if not self._fingerprint_matches(file, saved_sources.get(name))]
+        return changed, removed
+
+    def _snapshot_tables(self):
+        """Name -> DataFrame of everything stored in a snapshot"""
+        tables = {'iqvia_data': self.iqvia_data, 'pricing_data': self.pricing_data}
+        if self.store_index is not None:
+            tables['store_index'] = pd.DataFrame({'cd_filial': self.store_index, 'cd_brick': self.store_bricks})
+        for prefix, aggregated in (('iqvia_aggregated', self.iqvia_aggregated),
+                                   ('pricing_aggregated', self.pricing_aggregated)):
+            for name, df in (aggregated or {}).items():
+                tables[f"{prefix}__{name}"] = df
+        return {name: df for name, df in tables.items() if df is not None}
+
+    def _iqvia_month_cells(self):
+        """Month file name -> cells of the loaded aggregate"""
+        if self.iqvia_data is None or self.iqvia_data.empty:
+            return {}
+        counts = self.iqvia_data.groupby('id_periodo').size()
+        return {f"historico_iqvia_{period}.parquet": int(cells) for period, cells in counts.items()}
+
+    def save_snapshot(self):
+        """Write the loaded data and aggregations to a versioned on-disk snapshot
+
+        The snapshot is written to a temporary directory and published by
+        atomically replacing the CURRENT pointer, so readers never see a
+        half-written snapshot.
+        """
+        if self.iqvia_month_cap is not None:
+            print("⚠️  IQVIA parcial (limite de meses) - snapshot não salvo")
+            return None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix="tmp-", dir=self.cache_dir))
+        try:
+            tables = self._snapshot_tables()
+            for name, df in tables.items():
+                feather.write_feather(df.reset_index(drop=True), tmp_dir / f"{name}.arrow",
+                                      compression='uncompressed')
+
+            manifest = {
+                'version': CACHE_VERSION,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'sources': {file.name: self._file_fingerprint(file)
+                            for file in self._source_files() if file.exists()},
+                'memory_budget': self._memory_budget(),
+                'iqvia_grain': self.iqvia_grain,
+                # Células agregadas por mês: calibram o planejador da próxima carga completa
+                'iqvia_cells': self._iqvia_month_cells(),
+                # O índice de venda zero fica fora do snapshot (já está em disco): só o build
+                'zero_sales_requested': self.zero_sales_enabled,
+                'zero_sales_index': self.zero_sales_index.build_id if self.zero_sales_index is not None else None,
+                'tables': sorted(tables)
+            }
+            with open(tmp_dir / "manifest.json", 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+
+            snapshot_dir = self.cache_dir / f"snapshot-v{CACHE_VERSION}-{tmp_dir.name[4:]}"
+            os.rename(tmp_dir, snapshot_dir)
+
+            pointer_tmp = self.cache_dir / "CURRENT.tmp"
+            pointer_tmp.write_text(snapshot_dir.name, encoding='utf-8')
+            os.replace(pointer_tmp, self.cache_dir / "CURRENT")
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # Remover snapshots antigos
+        for old in self.cache_dir.glob("snapshot-*"):
+            if old != snapshot_dir:
+                shutil.rmtree(old, ignore_errors=True)
+
+        print(f"✓ Snapshot salvo em {snapshot_dir}")
+        return snapshot_dir
+
+    def _current_snapshot(self):
+        """Directory and manifest of the current snapshot, or (None, None)"""
+        pointer = self.cache_dir / "CURRENT"
+        if not pointer.exists():
+            return None, None
+
+        snapshot_dir = self.cache_dir / pointer.read_text(encoding='utf-8').strip()
+        try:
+            with open(snapshot_dir / "manifest.json", encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+
+        if manifest.get('version') != CACHE_VERSION:
+            return None, None
+        return snapshot_dir, manifest
+
+    def load_snapshot(self, incremental=True):
+        """Load data and aggregations from the on-disk snapshot
+
+        If the sources are unchanged the snapshot is used as is. Otherwise, with
+        incremental=True, only new/changed IQVIA months are aggregated and merged
+        (and pricing is reloaded if Preço.csv changed) before saving a new snapshot.
+        Returns False when a full load is needed.
+        """
+        snapshot_dir, manifest = self._current_snapshot()
+        if snapshot_dir is None:
+            return False
+
+        # Outro orçamento de memória pode levar a outra granularidade
+        if manifest.get('memory_budget') != self._memory_budget():
+            return False
+
+        # Índice de venda zero ligado/desligado desde o snapshot, ou reescrito por outra carga
+        if manifest.get('zero_sales_requested', False) != self.zero_sales_enabled:
+            return False
+        zero_index = None
+        if manifest.get('zero_sales_index') is not None:
+            zero_index = ZeroSalesIndex.load(self.cache_dir / ZERO_INDEX_DIR)
+            if zero_index is None or zero_index.build_id != manifest['zero_sales_index']:
+                return False
+
+        changed, removed = self._changed_sources(manifest['sources'])
+        pricing_name = "Preço.csv"
+        if changed or removed:
+            if (not incremental or pricing_name in removed
+                    or 'iqvia_data' not in manifest['tables']):
+                return False
+
+        tables = {name: feather.read_feather(snapshot_dir / f"{name}.arrow", memory_map=True)
+                  for name in manifest['tables']}
+
+        self.iqvia_data = tables.pop('iqvia_data', None)
+        self.pricing_data = tables.pop('pricing_data', None)
+        if self.iqvia_data is not None:
+            self.iqvia_data = self._sort_by_month(self.iqvia_data, 'data')
+        if self.pricing_data is not None:
+            self.pricing_data = self._sort_by_month(self.pricing_data, 'mes')
+        store_index = tables.pop('store_index', None)
+        self.store_index = store_index['cd_filial'].to_numpy() if store_index is not None else None
+        self.store_bricks = store_index['cd_brick'].to_numpy() if store_index is not None else None
+        self.zero_sales_index = zero_index
+        self.iqvia_grain = manifest.get('iqvia_grain', IQVIA_GRAINS[0])
+        self.iqvia_aggregated, self.pricing_aggregated = {}, {}
+        for key, df in tables.items():
+            prefix, name = key.split('__', 1)
+            getattr(self, prefix)[name] = df
+        self.pricing_cube = PricingCube.from_tables(self.pricing_aggregated)
+        self._invalidate_results()
+
+        print(f"✓ Snapshot carregado de {snapshot_dir} ({manifest['created_at']})")
+        if not changed and not removed:
+            return True
+
+        # Atualização incremental: só o que mudou desde o snapshot
+        if any(file.name == pricing_name for file in changed):
+            self.load_pricing_data_fast()
+            self._precompute_pricing_aggregations()
+
+        iqvia_changed = [file for file in changed if file.name != pricing_name]
+        removed_periods = [int(Path(name).stem.split('_')[-1]) for name in removed]
+        if iqvia_changed or removed_periods:
+            self.ingest_iqvia_months(iqvia_changed, removed_periods)
+
+        self.save_snapshot()
+        return True
+
+    def quick_load(self, use_cache=None):
+        """Load ALL available data from 2025
+
+        With use_cache (default RD_CACHE, on) the aggregated data is read from the
+        on-disk snapshot while the source files are unchanged, and the snapshot is
+        rebuilt after a full load otherwise.
+        """
+        if use_cache is None:
+            use_cache = os.getenv('RD_CACHE', 'true').lower() == 'true'
+
         print("\n" + "="*60)
         print("🚀 CARREGAMENTO COMPLETO (Janeiro - Setembro 2025)")
         print("="*60 + "\n")
 
-        # Load pricing - todos os meses de 2025 até setembro
-        self.load_pricing_data_fast()
+        if not (use_cache and self.load_snapshot()):
+            # Load pricing - todos os meses de 2025 até setembro
+            self.load_pricing_data_fast()
 
-        # Load all IQVIA data available from 2025
-        self.load_iqvia_all()
+            # Load all IQVIA data available from 2025
+            self.load_iqvia_all()
 
-        # Pre-compute aggregations
-        self.precompute_aggregations()
+            # Pre-compute aggregations
+            self.precompute_aggregations()
+
+            if use_cache:
+                self.save_snapshot()
 
         # Mostrar resumo dos dados carregados
         if self.pricing_data is not None:
@@ -212,137 +1453,520 @@ class OptimizedDataProcessor:
         print(f"   Pricing: {pricing_months} meses | IQVIA: {iqvia_months} meses")
         print("="*60 + "\n")
 
+    def _invalidate_results(self):
+        """New data loaded: bump the data version and drop cached getter results"""
+        self.data_version += 1
+        self._time_indexes = {}
+        self._dimension_indexes = {}
+        self._selections = {}
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def result_cache_stats(self):
+        """Hit/miss counters and memory of the getter result cache"""
+        return self.result_cache.stats() if self.result_cache is not None else {}
+
+    def _backend(self, getter):
+        """Compute backend configured for a getter (see compute_backends)"""
+        name = self.compute_backends.get(getter, self.compute_backends['default'])
+        if name not in self._backend_instances:
+            self._backend_instances[name] = get_compute_backend(name)
+        return self._backend_instances[name]
+
+    @staticmethod
+    def _sort_by_month(df, column):
+        """df ordered by its month column (stable), unchanged if already sorted"""
+        if df.empty or df[column].is_monotonic_increasing:
+            return df
+        return df.sort_values(column, kind='stable', ignore_index=True)
+
+    def _time_index(self, df, column):
+        """Month-offset index of a month-sorted frame, built once per loaded frame"""
+        key = (id(df), column)
+        entry = self._time_indexes.get(key)
+        if entry is None or entry[0] is not df:
+            if not df[column].is_monotonic_increasing:
+                return None
+            entry = (df, *month_offsets(df[column].to_numpy()))
+            self._time_indexes[key] = entry
+        return entry[1], entry[2]
+
+    def _filter_rows(self, df, column):
+        """(start, stop) rows of the date filter in a month-sorted frame
+
+        Located by binary search over the month-offset index, so filtering is a
+        positional slice instead of a full-length mask. None without a filter
+        (or if df is not sorted by column).
+        """
+        if df is None or self.date_filter_start is None or self.date_filter_end is None:
+            return None
+        index = self._time_index(df, column)
+        if index is None:
+            return None
+
+        months, offsets = index
+        first = np.searchsorted(months, np.datetime64(self.date_filter_start), side='left')
+        last = np.searchsorted(months, np.datetime64(self.date_filter_end), side='right')
+        return int(offsets[first]), int(offsets[max(first, last)])
+
+    def _dimension_index(self, df):
+        """Per-value row index of a frame over its filterable columns, built once per frame"""
+        entry = self._dimension_indexes.get(id(df))
+        if entry is None or entry[0] is not df:
+            columns = [col for col in FILTER_DIMS + ['cd_produto'] if col in df.columns]
+            entry = (df, DimensionIndex(df, columns))
+            self._dimension_indexes[id(df)] = entry
+        return entry[1]
+
+    def _combined_filters(self, within=None, exclude=()):
+        """Active dimension filters (minus the exclude dimensions) ANDed with extra {dimension: value(s)} constraints"""
+        filters = {dim: values for dim, values in self.dimension_filters.items() if dim not in exclude}
+        for dim, values in (within or {}).items():
+            values = _filter_values(values)
+            filters[dim] = tuple(v for v in filters[dim] if v in values) if dim in filters else values
+        return filters
+
+    def _filter_products(self, products=None, filters=None):
+        """products narrowed by the produto/neogrupo filters (None = no constraint)"""
+        filters = self.dimension_filters if filters is None else filters
+        allowed = None
+        if 'produto' in filters:
+            allowed = set(filters['produto'])
+        if 'neogrupo' in filters:
+            pairs = self._pricing_rollup(['neogrupo', 'produto'])
+            in_category = set() if pairs is None else set(
+                pairs.loc[pairs['neogrupo'].isin(filters['neogrupo']), 'produto'].tolist())
+            allowed = in_category if allowed is None else allowed & in_category
+
+        if allowed is None:
+            return products
+        if products is not None:
+            allowed &= set(np.atleast_1d(products).tolist())
+        return sorted(allowed)
+
+    def _frame_filters(self, df, filters):
+        """Dimension filters that apply to df, as {column: values}"""
+        if 'cd_produto' in df.columns:
+            # IQVIA agregado: canal e UF não existem
+            products = self._filter_products(filters=filters)
+            return {} if products is None else {'cd_produto': products}
+        return {dim: values for dim, values in filters.items() if dim in df.columns}
+
+    def _filter_selection(self, df, column, filters=None):
+        """Rows of df selected by the date filter and the dimension filters
+
+        filters defaults to the active dimension filters. Returns None for
+        every row, a (start, stop) range when only the date filter is set, or
+        sorted row positions resolved through the dimension index. The
+        positions are resolved once per frame and filter state.
+        """
+        filters = self.dimension_filters if filters is None else filters
+        key = (id(df), column, self.date_filter_start, self.date_filter_end,
+               tuple(sorted(filters.items())))
+        entry = self._selections.get(key)
+        if entry is not None and entry[0] is df:
+            return entry[1]
+
+        rows = self._select_rows(df, column, filters)
+        if len(self._selections) >= 32:
+            self._selections.clear()
+        self._selections[key] = (df, rows)
+        return rows
+
+    def _select_rows(self, df, column, filters):
+        rows = self._filter_rows(df, column)
+        if rows is None and self.date_filter_start is not None and self.date_filter_end is not None:
+            # Frame fora de ordem: cair para a máscara de datas
+            rows = np.flatnonzero(((df[column] >= self.date_filter_start)
+                                   & (df[column] <= self.date_filter_end)).to_numpy())
+        filters = self._frame_filters(df, filters)
+        if not filters:
+            return rows
+        return self._dimension_index(df).select(filters, rows)
+
+    def _apply_filters(self, df, column):
+        """Rows of df selected by the active filters (a zero-copy slice for date-only filters)"""
+        rows = self._filter_selection(df, column)
+        if rows is None:
+            return df
+        if isinstance(rows, tuple):
+            return df.iloc[rows[0]:rows[1]]
+        return df.take(rows)
+
+    def _backend_agg(self, getter, df, column, keys, aggs, filters=None):
+        """Group the filtered rows of df with the getter's backend"""
+        return self._backend(getter).groupby_agg(df, keys, aggs,
+                                                 rows=self._filter_selection(df, column, filters))
+
+    def _pricing_prefix_agg(self, getter, keys, aggs):
+        """Pricing aggregation from the cube's month prefix sums, or None if unsupported
+
+        The date filter becomes the difference of two prefix rows per key, so
+        the cost is O(months x keys) for any range. Only the reduction to keys
+        coarser than the rollup (and nunique/first) goes through the backend.
+        """
+        by_month = keys[:1] == ['mes']
+        dims = keys[1:] if by_month else keys
+        if 'mes' in dims or any(func not in ('sum', 'nunique', 'first') for _, func in aggs.values()):
+            return None
+        name = self.pricing_cube.prefix_rollup(dims + [col for col, _ in aggs.values()])
+        if name is None:
+            return None
+
+        totals = self.pricing_cube.range_totals(name, self.date_filter_start, self.date_filter_end, by_month)
+        if dims == CUBE_ROLLUPS[name] and all(func == 'sum' for _, func in aggs.values()):
+            # Mesma granularidade do rollup: as somas já são o resultado
+            return totals[keys + [col for col, _ in aggs.values()]].set_axis(keys + list(aggs), axis=1)
+        return self._backend(getter).groupby_agg(totals, keys, aggs)
+
+    def _pricing_agg(self, getter, keys, aggs, within=None, exclude=()):
+        """Roll the filtered pricing cube up to keys
+
+        within adds {dimension: value(s)} constraints to the active filters and
+        exclude ignores the active filters of some dimensions.
+        Served from the month prefix sums when possible; otherwise (dimension
+        filters, or RD_PRICING_PREFIX=false) the getter's backend groups the
+        selected rows of the smallest rollup holding the filtered dimensions.
+        """
+        filters = self._combined_filters(within, exclude)
+        rollup = self._pricing_rollup(keys + [col for col, _ in aggs.values()] + list(filters))
+        if rollup is None:
+            return pd.DataFrame()
+        if self.pricing_prefix and not filters:
+            result = self._pricing_prefix_agg(getter, keys, aggs)
+            if result is not None:
+                return result
+        return self._backend_agg(getter, rollup, 'mes', keys, aggs, filters)
+
+    @cached_result
     def get_revenue_metrics(self):
         """Calculate revenue metrics from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
+        totals = self._pricing_agg('get_revenue_metrics', [], {
+            'total_revenue': ('rbv', 'sum'),
+            'total_units': ('qt_unidade_vendida', 'sum'),
+            'unique_products': ('produto', 'nunique'),
+            'orders_count': ('linhas', 'sum')
+        })
+        if totals.empty or totals['orders_count'].iloc[0] == 0:
             return {}
 
-        total = df['rbv'].sum()
-        units = df['qt_unidade_vendida'].sum()
-
-        metrics = {
-            'total_revenue': total,
-            'total_units': units,
-            'avg_price': df['preco_medio'].mean(),
-            'unique_products': df['produto'].nunique(),
-            'orders_count': len(df)
-        }
+        totals.insert(2, 'avg_price', weighted_price(totals['total_revenue'], totals['total_units']))
+        metrics = {col: totals[col].iloc[0] for col in totals.columns}
         return metrics
 
+    @cached_result
     def get_market_share_metrics(self):
-        """Calculate market share metrics from pre-aggregated data (com filtro de data)"""
+        """Calculate market share metrics from pre-aggregated data (com filtro de data)
+
+        IQVIA has no canal or UF: under those filters the metrics stay
+        national, flagged by 'national'. unique_stores/unique_bricks are
+        exact from the store bitmaps at the 'bitmap' grain, HLL estimates at
+        the 'sketch' grain and None at the 'count' grain, which keeps no
+        distinct-count structure.
+        """
         df = self.get_filtered_iqvia_data()
         if df.empty:
             return {}
 
         # Como dados já estão agregados por produto, ajustar cálculos
+        total_rd = df['venda_rd'].sum()
+        total_competitor = df['venda_concorrente'].sum()
         metrics = {
-            'avg_share': df['share'].mean(),
-            'total_rd_sales': df['venda_rd'].sum(),
-            'total_competitor_sales': df['venda_concorrente'].sum(),
+            'avg_share': weighted_share(total_rd, total_competitor),
+            'total_rd_sales': total_rd,
+            'total_competitor_sales': total_competitor,
             'zero_sales_rate': (df['venda_rd'] == 0).mean(),
             'unique_products': df['cd_produto'].nunique(),
-            'unique_stores': df['cd_filial'].sum() if 'cd_filial' in df.columns else 0,  # Já é count agregado
-            'unique_bricks': df['cd_brick'].sum() if 'cd_brick' in df.columns else 0  # Já é count agregado
+            # Na granularidade 'count' não há sketches nem bitmaps: somar counts por célula
+            # conta a mesma loja uma vez por produto, então a contagem fica indisponível
+            'unique_stores': None,
+            'unique_bricks': None,
+            'national': any(dim in self.dimension_filters for dim in IQVIA_NATIONAL_DIMS)
         }
+
+        if 'bm_filial' in df.columns:
+            # Bitmaps: lojas exatas pela união, bricks exatos pelo brick de cada loja
+            covered = bitmap_or(from_bytes(df['bm_filial']))[None]
+            metrics['unique_stores'] = int(popcount(covered)[0])
+            metrics['unique_bricks'] = int(bitmap_distinct(covered, self.store_bricks)[0])
+        elif 'hll_filial' in df.columns:
+            metrics['unique_stores'] = hll_count(df['hll_filial'])
+            metrics['unique_bricks'] = hll_count(df['hll_brick'])
         return metrics
 
+    @cached_result
+    def get_unique_coverage(self, by='data'):
+        """Distinct stores/bricks per group (com filtro de data)
+
+        Exact from the store bitmaps at the 'bitmap' grain, estimated from the
+        HLL sketches at the 'sketch' grain. by can be any IQVIA column ('data',
+        'cd_produto', ...) or 'categoria', which maps cd_produto to the pricing
+        neogrupo. Rows come sorted by the group.
+        """
+        df = self.get_filtered_iqvia_data()
+        if df.empty or not {'bm_filial', 'hll_filial'} & set(df.columns):
+            return pd.DataFrame()
+
+        if by == 'categoria':
+            categories = self._product_categories()
+            if categories is None:
+                return pd.DataFrame()
+            keys = df['cd_produto'].map(categories)
+        else:
+            keys = df[by]
+
+        codes, uniques = pd.factorize(keys, sort=True)
+        valid = codes >= 0
+
+        result = pd.DataFrame({by: uniques})
+        if 'bm_filial' in df.columns:
+            covered = bitmap_merge(from_bytes(df['bm_filial'])[valid], codes[valid], len(uniques))
+            result['unique_stores'] = popcount(covered).astype('int64')
+            result['unique_bricks'] = bitmap_distinct(covered, self.store_bricks)
+        else:
+            for col, name in (('hll_filial', 'unique_stores'), ('hll_brick', 'unique_bricks')):
+                merged = hll_merge(from_bytes(df[col])[valid], codes[valid], len(uniques))
+                result[name] = np.round(hll_estimate(merged)).astype('int64')
+        return result.sort_values(by, ignore_index=True)
+
+    def _product_categories(self):
+        """neogrupo of each pricing produto (Series indexed by produto), from the cube's product rollup"""
+        pairs = self._pricing_rollup(['neogrupo', 'produto'])
+        if pairs is None:
+            return None
+        return pairs.drop_duplicates('produto').set_index('produto')['neogrupo'].astype(str)
+
+    @cached_result
     def get_revenue_trend(self):
         """Get revenue trend from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
+        result = self._pricing_agg('get_revenue_trend', ['mes'], {
+            'rbv': ('rbv', 'sum'),
+            'qt_unidade_vendida': ('qt_unidade_vendida', 'sum')
+        })
+        if result.empty:
             return pd.DataFrame()
 
-        result = df.groupby('mes').agg({
-            'rbv': 'sum',
-            'qt_unidade_vendida': 'sum',
-            'preco_medio': 'mean'
-        }).reset_index()
+        result.insert(3, 'preco_medio', weighted_price(result['rbv'], result['qt_unidade_vendida']))
         result.columns = ['data', 'receita', 'unidades', 'preco_medio']
         return result
 
+    @cached_result
     def get_market_share_trend(self):
         """Get market share trend from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_iqvia_data()
-        if df.empty:
+        if self.iqvia_data is None:
+            return pd.DataFrame()
+        result = self._backend_agg('get_market_share_trend', self.iqvia_data, 'data', ['data'], {
+            'venda_rd': ('venda_rd', 'sum'),
+            'venda_concorrente': ('venda_concorrente', 'sum')
+        })
+        if result.empty:
             return pd.DataFrame()
 
-        result = df.groupby('data').agg({
-            'share': 'mean',
-            'venda_rd': 'sum',
-            'venda_concorrente': 'sum'
-        }).reset_index()
+        result.insert(1, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
         return result
 
+    @cached_result
     def get_channel_performance(self):
         """Get performance by channel from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
-            return pd.DataFrame()
-
-        result = df.groupby('canal').agg({
-            'rbv': 'sum',
-            'qt_unidade_vendida': 'sum',
-            'preco_medio': 'mean'
-        }).reset_index()
+        result = self._pricing_agg('get_channel_performance', ['canal'], {
+            'rbv': ('rbv', 'sum'),
+            'qt_unidade_vendida': ('qt_unidade_vendida', 'sum')
+        })
+        if result.empty:
+            # Sem linhas para o filtro: frame vazio com as colunas (as abas indexam por nome)
+            return pd.DataFrame(columns=['canal', 'rbv', 'qt_unidade_vendida', 'preco_medio', 'pct_receita'])
+
+        result.insert(3, 'preco_medio', weighted_price(result['rbv'], result['qt_unidade_vendida']))
         result['pct_receita'] = result['rbv'] / result['rbv'].sum() * 100
         return result
 
+    @cached_result
     def get_category_performance(self):
         """Get performance by category from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
-            return pd.DataFrame()
-
-        result = df.groupby('neogrupo').agg({
-            'rbv': 'sum',
-            'qt_unidade_vendida': 'sum',
-            'preco_medio': 'mean',
-            'produto': 'nunique'
-        }).reset_index()
+        result = self._pricing_agg('get_category_performance', ['neogrupo'], {
+            'rbv': ('rbv', 'sum'),
+            'qt_unidade_vendida': ('qt_unidade_vendida', 'sum'),
+            'produto': ('produto', 'nunique')
+        })
+        if result.empty:
+            return pd.DataFrame(columns=['categoria', 'receita', 'unidades', 'preco_medio', 'produtos', 'pct_receita'])
+
+        result.insert(3, 'preco_medio', weighted_price(result['rbv'], result['qt_unidade_vendida']))
         result.columns = ['categoria', 'receita', 'unidades', 'preco_medio', 'produtos']
         result['pct_receita'] = result['receita'] / result['receita'].sum() * 100
         result = result.sort_values('receita', ascending=False)
         return result
 
+    @cached_result
     def get_state_performance(self):
         """Get performance by state from pre-aggregated data (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
-            return pd.DataFrame()
-
-        result = df.groupby('uf').agg({
-            'rbv': 'sum',
-            'qt_unidade_vendida': 'sum',
-            'preco_medio': 'mean'
-        }).reset_index()
+        result = self._pricing_agg('get_state_performance', ['uf'], {
+            'rbv': ('rbv', 'sum'),
+            'qt_unidade_vendida': ('qt_unidade_vendida', 'sum')
+        })
+        if result.empty:
+            return pd.DataFrame(columns=['estado', 'receita', 'unidades', 'preco_medio', 'pct_receita'])
+
+        result.insert(3, 'preco_medio', weighted_price(result['rbv'], result['qt_unidade_vendida']))
         result.columns = ['estado', 'receita', 'unidades', 'preco_medio']
         result['pct_receita'] = result['receita'] / result['receita'].sum() * 100
         result = result.sort_values('receita', ascending=False)
         return result
 
-    def get_top_products(self, top_n=20, by='revenue'):
-        """Get top performing products (com filtro de data)"""
-        df = self.get_filtered_pricing_data()
-        if df.empty:
-            return pd.DataFrame()
+    def _listed_top_products(self, sort_col, top_n, dimension=None, value=None):
+        """Top products from the cube's precomputed lists, or None if they cannot answer
 
-        sort_col = 'rbv' if by == 'revenue' else 'qt_unidade_vendida'
+        The lists cover every month without dimension filters, so they apply
+        only when no dimension filter is active and the date filter (if any)
+        spans all months.
+        """
+        if (top_n > TOP_N_LISTED or self.dimension_filters or isinstance(value, (list, tuple))
+                or (dimension is not None and dimension not in TOP_LIST_DIMS)
+                or self._pricing_rollup(['produto']) is None):
+            return None
+        months = self.pricing_cube.months
+        if (self.date_filter_start is not None and self.date_filter_end is not None and len(months)
+                and (np.datetime64(self.date_filter_start) > months[0]
+                     or np.datetime64(self.date_filter_end) < months[-1])):
+            return None
 
-        result = df.groupby('produto').agg({
-            'rbv': 'sum',
-            'qt_unidade_vendida': 'sum',
-            'preco_medio': 'mean',
-            'neogrupo': 'first'
-        }).reset_index()
+        listed = self.pricing_cube.top_products(dimension, sort_col).get(value)
+        return pd.DataFrame() if listed is None else listed.head(top_n)
+
+    @cached_result
+    def get_top_products(self, top_n=20, by='revenue', dimension=None, value=None):
+        """Get top performing products (com filtro de data)
 
-        result = result.sort_values(sort_col, ascending=False).head(top_n)
+        dimension/value (neogrupo, uf or canal) ranks only the products of one
+        value, on top of the active filters. Only the top_n products are
+        selected (argpartition) and sorted; without filters the cube's
+        precomputed top lists answer directly.
+        """
+        sort_col = 'rbv' if by == 'revenue' else 'qt_unidade_vendida'
+        result = self._listed_top_products(sort_col, top_n, dimension, value)
+        if result is None:
+            within = None if dimension is None else {dimension: value}
+            result = self._pricing_agg('get_top_products', ['produto'], {
+                'rbv': ('rbv', 'sum'),
+                'qt_unidade_vendida': ('qt_unidade_vendida', 'sum'),
+                'neogrupo': ('neogrupo', 'first')
+            }, within)
+            if not result.empty:
+                result = result.iloc[top_k(result[sort_col].to_numpy(), top_n)]
+        if result.empty:
+            return pd.DataFrame()
+
+        result.insert(3, 'preco_medio', weighted_price(result['rbv'], result['qt_unidade_vendida']))
         result.columns = ['produto', 'receita', 'unidades', 'preco_medio', 'categoria']
         return result
 
+    @cached_result
+    def get_abc_analysis(self, dimension='produto', thresholds=ABC_THRESHOLDS, by='revenue'):
+        """ABC (Pareto) classification of products, UFs or categories (com filtro de data)
+
+        Items are ranked by revenue (units with by='units'). An item is class A
+        while the cumulative share is within thresholds[0] percent, B within
+        thresholds[1] and C beyond. Returns {'items': ranked items with the
+        cumulative curve and class, 'classes': count and value per class,
+        'thresholds': the limits used}.
+        """
+        if dimension not in ABC_DIMS:
+            raise ValueError(f"Dimensão ABC inválida: {dimension} (use {', '.join(ABC_DIMS)})")
+        limit_a, limit_b = thresholds
+        if not 0 < limit_a <= limit_b <= 100:
+            raise ValueError(f"Limites ABC inválidos: {thresholds} (use 0 < A <= B <= 100)")
+
+        value_col = 'rbv' if by == 'revenue' else 'qt_unidade_vendida'
+        totals = self._pricing_agg('get_abc_analysis', [dimension], {value_col: (value_col, 'sum')})
+        return self._abc_curve(totals, dimension, value_col, (limit_a, limit_b))
+
+    @staticmethod
+    def _abc_curve(totals, id_col, value_col, thresholds):
+        """Pareto curve and ABC classes of per-item totals (see get_abc_analysis)"""
+        if totals.empty:
+            totals = pd.DataFrame({id_col: pd.Series(dtype='object'), value_col: pd.Series(dtype='float64')})
+        order = np.argsort(-totals[value_col].to_numpy(), kind='stable')
+        values = totals[value_col].to_numpy()[order]
+        n_items = len(values)
+
+        cumsum = np.cumsum(values, dtype=np.float64)
+        total = cumsum[-1] if n_items else 0.0
+        cumsum_pct = cumsum / total * 100 if total > 0 else np.zeros(n_items)
+        # <= limite A -> A, <= limite B -> B, acima -> C
+        codes = np.searchsorted(np.asarray(thresholds, dtype=np.float64), cumsum_pct, side='left')
+        ranking = np.arange(1, n_items + 1)
+
+        items = pd.DataFrame({
+            id_col: totals[id_col].array.take(order),
+            value_col: values,
+            'ranking': ranking,
+            'cumsum': cumsum,
+            'cumsum_pct': cumsum_pct,
+            'pct_itens': ranking / n_items * 100 if n_items else ranking.astype(np.float64),
+            'classe': pd.Categorical.from_codes(codes, ABC_CLASSES)
+        })
+
+        counts = np.bincount(codes, minlength=len(ABC_CLASSES))
+        class_values = np.bincount(codes, weights=values.astype(np.float64), minlength=len(ABC_CLASSES))
+        classes = pd.DataFrame({
+            'classe': ABC_CLASSES,
+            'itens': counts,
+            value_col: class_values,
+            'pct_itens': counts / n_items * 100 if n_items else np.zeros(len(ABC_CLASSES)),
+            'pct_valor': class_values / total * 100 if total > 0 else np.zeros(len(ABC_CLASSES))
+        })
+        return {'items': items, 'classes': classes, 'thresholds': tuple(thresholds)}
+
+    @cached_result
+    def get_zero_sales_opportunities(self, products=None, stores=None, bricks=None, by='cd_produto'):
+        """Store-level zero-sales gaps by product, store or brick (com filtro de data)
+
+        Counts the (month, product, store) cells where RD sold zero while
+        competitors sold: competitor volume, cells, distinct stores and
+        products. by=None returns the cells themselves. Answered from the
+        zero-sales index built during ingestion; without it (RD_ZERO_SALES_INDEX
+        off or no room in the memory budget) the raw rows are scanned.
+        """
+        if by not in (None, 'cd_produto', 'cd_filial', 'cd_brick'):
+            raise ValueError(f"Agrupamento inválido para venda zero: {by}")
+        if self.zero_sales_index is not None:
+            cells = self.zero_sales_index.select(self._date_filter_periods(), self._filter_products(products),
+                                                 stores, bricks)
+        else:
+            raw = self.scan_iqvia(products=products, stores=stores, bricks=bricks, columns=IQVIA_AGG_SOURCE_COLS)
+            zero = (raw['venda_rd'] == 0) & (raw['venda_concorrente'] > 0)
+            cells = raw.loc[zero, ZERO_SALES_COLS].astype('int32').sort_values(
+                ['id_periodo', 'cd_produto', 'cd_filial'], ignore_index=True)
+        if cells.empty:
+            return pd.DataFrame()
+        if by is None:
+            return cells.reset_index(drop=True)
+
+        result = cells.groupby(by).agg(
+            venda_concorrente=('venda_concorrente', 'sum'),
+            celulas=('venda_concorrente', 'size'),
+            lojas=('cd_filial', 'nunique'),
+            produtos=('cd_produto', 'nunique')
+        ).reset_index()
+        result['venda_concorrente'] = result['venda_concorrente'].astype('int64')
+        return result.sort_values('venda_concorrente', ascending=False, ignore_index=True)
+
+    @cached_result
     def get_zero_sales_analysis(self):
-        """Analyze zero sales opportunities from pre-aggregated data (com filtro de data)"""
+        """Analyze zero sales opportunities (com filtro de data)
+
+        With the store-level index every store where RD sold zero while
+        competitors sold counts. Without it only products with no RD sales in
+        any store of a month are found, from the pre-aggregated data.
+        """
+        if self.zero_sales_index is not None:
+            result = self.get_zero_sales_opportunities(by='cd_produto')
+            if result.empty:
+                return pd.DataFrame()
+            result = result[['cd_produto', 'venda_concorrente', 'lojas']]
+            result.columns = ['produto', 'venda_concorrente', 'lojas_afetadas']
+            return result
+
         df = self.get_filtered_iqvia_data()
         if df.empty:
             return pd.DataFrame()
@@ -355,14 +1979,50 @@ class OptimizedDataProcessor:
             'venda_concorrente': 'sum',
             'cd_filial': 'sum'  # Já é count agregado
         }).reset_index()
+
+        # Com bitmaps: lojas distintas exatas (OR dos meses) em vez da soma de counts
+        if 'bm_zero' in zero_sales_df.columns and not zero_sales_df.empty:
+            codes, products = pd.factorize(zero_sales_df['cd_produto'])
+            merged = bitmap_merge(from_bytes(zero_sales_df['bm_zero']), codes, len(products))
+            exact_stores = pd.Series(popcount(merged), index=products)
+            result['cd_filial'] = result['cd_produto'].map(exact_stores).astype('int64')
+
         result.columns = ['produto', 'venda_concorrente', 'lojas_afetadas']
         result = result.sort_values('venda_concorrente', ascending=False)
         return result
 
+    @cached_result
+    def get_store_coverage(self, products=None, how='any'):
+        """Exact store coverage from the store bitmaps (com filtro de data)
+
+        Counts the stores that carry any of the products and those where RD sold
+        zero of them. how='any' ORs the selected months, how='all' keeps only
+        stores that qualify in every selected month.
+        """
+        df = self.get_filtered_iqvia_data()
+        if products is not None:
+            df = df[df['cd_produto'].isin(products)]
+        if df.empty or 'bm_filial' not in df.columns:
+            return {}
+
+        codes, months = pd.factorize(df['data'])
+        combine = bitmap_and if how == 'all' else bitmap_or
+
+        coverage = {}
+        for col, name in (('bm_filial', 'lojas_com_produto'), ('bm_zero', 'lojas_venda_zero')):
+            per_month = bitmap_merge(from_bytes(df[col]), codes, len(months))
+            coverage[name] = int(popcount(combine(per_month)))
+        coverage['lojas_total'] = len(self.store_index)
+        return coverage
+
+    @cached_result
     def get_growth_rates(self, periods=3):
         """Calculate growth rates"""
-        revenue_trend = self.get_revenue_trend()
+        return self._growth_rates(self.get_revenue_trend(), self.get_market_share_trend(), periods)
 
+    @staticmethod
+    def _growth_rates(revenue_trend, share_trend, periods=3):
+        """Revenue and share growth over the last periods months of the given trends"""
         if len(revenue_trend) < periods + 1:
             return {'revenue_growth': 0, 'share_growth': 0}
 
@@ -371,8 +2031,6 @@ class OptimizedDataProcessor:
         previous = revenue_trend['receita'].iloc[-(periods + 1)]
         revenue_growth = ((current - previous) / previous) * 100 if previous > 0 else 0
 
-        share_trend = self.get_market_share_trend()
-
         if len(share_trend) < periods + 1:
             return {'revenue_growth': revenue_growth, 'share_growth': 0}
 
@@ -386,6 +2044,7 @@ class OptimizedDataProcessor:
             'share_growth': share_growth
         }
 
+    @cached_result
     def predict_next_month_revenue(self, periods=3):
         """Simple linear regression prediction"""
         trend = self.get_revenue_trend()
@@ -403,6 +2062,7 @@ class OptimizedDataProcessor:
 
         return max(0, next_value)
 
+    @cached_result
     def predict_market_share(self, periods=3):
         """Predict market share trend"""
         trend = self.get_market_share_trend()
@@ -420,42 +2080,158 @@ class OptimizedDataProcessor:
 
         return max(0, min(1, next_value))
 
+    @cached_result
+    def get_scenario_base(self, by=None):
+        """Per-segment inputs of the scenario engine (com filtro de data)
+
+        One row per category (by='neogrupo'), UF (by='uf') or a single 'Total'
+        row: revenue, units, weighted price, RD share, competitor volume of the
+        zero-sales gaps and revenue of the segment's top SCENARIO_TOP_SHARE
+        products. IQVIA has no canal or UF, so per UF the share is the overall
+        one and the zero-sales volume is apportioned by revenue; with canal/uf
+        filters the zero-sales volume is scaled by the fraction of the
+        segment's revenue they keep.
+        """
+        if by is not None and by not in SCENARIO_DIMS:
+            raise ValueError(f"Segmentação de cenários inválida: {by} (use {', '.join(SCENARIO_DIMS)})")
+
+        keys = ([by] if by else []) + ['produto']
+        products = self._pricing_agg('get_scenario_base', keys, {
+            'rbv': ('rbv', 'sum'),
+            'qt_unidade_vendida': ('qt_unidade_vendida', 'sum')
+        })
+        if products.empty:
+            return pd.DataFrame()
+        products['segmento'] = products[by].astype(str) if by else 'Total'
+
+        # Top produtos de cada segmento: ordenar por receita e cortar pelo posto no segmento
+        products = products.sort_values(['segmento', 'rbv'], ascending=[True, False], ignore_index=True)
+        grouped = products.groupby('segmento', sort=True)
+        rank = grouped.cumcount().to_numpy()
+        top_n = np.maximum(1, (grouped['produto'].transform('size').to_numpy() * SCENARIO_TOP_SHARE).astype(int))
+        products['rbv_top'] = np.where(rank < top_n, products['rbv'].to_numpy(), 0.0)
+
+        base = products.groupby('segmento', sort=True).agg(
+            receita=('rbv', 'sum'),
+            unidades=('qt_unidade_vendida', 'sum'),
+            receita_top=('rbv_top', 'sum')
+        ).reset_index()
+        base.insert(3, 'preco_medio', weighted_price(base['receita'], base['unidades']))
+
+        zero_sales = self.get_zero_sales_analysis()
+        # Receita sem os filtros de canal/UF, que o IQVIA ignora: base do rateio da venda zero
+        scope_keys = ['neogrupo'] if by == 'neogrupo' else []
+        unscoped = self._pricing_agg('get_scenario_base', scope_keys, {'rbv': ('rbv', 'sum')},
+                                     exclude=IQVIA_NATIONAL_DIMS)
+        if scope_keys:
+            unscoped = unscoped.set_index(unscoped['neogrupo'].astype(str))['rbv'].reindex(base['segmento'])
+        else:
+            unscoped = pd.Series(unscoped['rbv'].sum(), index=base['segmento'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scope = np.where(unscoped.to_numpy() > 0, base['receita'].to_numpy() / unscoped.to_numpy(), 0.0)
+
+        if by == 'neogrupo':
+            # Share e venda zero por categoria: produtos IQVIA mapeados pela categoria nos preços
+            category = self._product_categories()
+            iqvia = self.get_filtered_iqvia_data()
+            sales = iqvia.groupby(iqvia['cd_produto'].map(category))[['venda_rd', 'venda_concorrente']].sum()
+            sales = sales.reindex(base['segmento']).fillna(0)
+            base['share'] = weighted_share(sales['venda_rd'], sales['venda_concorrente'])
+            zero = (zero_sales.groupby(zero_sales['produto'].map(category))['venda_concorrente'].sum()
+                    if not zero_sales.empty else pd.Series(dtype='float64'))
+            base['venda_zero'] = zero.reindex(base['segmento']).fillna(0).to_numpy(dtype=np.float64) * scope
+        else:
+            base['share'] = self.get_market_share_metrics().get('avg_share', 0)
+            total_zero = float(zero_sales['venda_concorrente'].sum()) if not zero_sales.empty else 0.0
+            base['venda_zero'] = total_zero * scope
+        return base[['segmento', 'receita', 'unidades', 'preco_medio', 'share', 'venda_zero', 'receita_top']]
+
+    @cached_result
+    def get_scenario_grid(self, share_uplift=(0.0,), zero_recovery=(0.0,), mix_uplift=(0.0,), by=None):
+        """Projected revenue for every combination of the parameter grids (com filtro de data)
+
+        share_uplift adds share points (0.05 = +5pp) and scales revenue by
+        (share + uplift) / share; zero_recovery is the fraction of the
+        zero-sales competitor volume won at the segment's average price;
+        mix_uplift grows the revenue of the segment's top products. The effects
+        add up. Every segment x combination comes from one broadcast NumPy
+        expression over get_scenario_base, one row each.
+        """
+        base = self.get_scenario_base(by)
+        if base.empty:
+            return pd.DataFrame()
+        share_uplift, zero_recovery, mix_uplift = (np.asarray(values, dtype=np.float64).ravel()
+                                                   for values in (share_uplift, zero_recovery, mix_uplift))
+
+        # Eixos: (segmento, share_uplift, zero_recovery, mix_uplift)
+        revenue = base['receita'].to_numpy(dtype=np.float64)[:, None, None, None]
+        share = base['share'].to_numpy(dtype=np.float64)[:, None, None, None]
+        zero_value = (base['venda_zero'] * base['preco_medio']).to_numpy(dtype=np.float64)[:, None, None, None]
+        top_revenue = base['receita_top'].to_numpy(dtype=np.float64)[:, None, None, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share_gain = np.where(share > 0, revenue * share_uplift[None, :, None, None] / share, 0.0)
+        increase = (share_gain
+                    + zero_value * zero_recovery[None, None, :, None]
+                    + top_revenue * mix_uplift[None, None, None, :])
+
+        index = np.indices(increase.shape).reshape(increase.ndim, -1)
+        current = base['receita'].to_numpy(dtype=np.float64)[index[0]]
+        increase = increase.ravel()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            increase_pct = np.where(current > 0, increase / current * 100, 0.0)
+        return pd.DataFrame({
+            'segmento': base['segmento'].to_numpy()[index[0]],
+            'share_uplift': share_uplift[index[1]],
+            'zero_recovery': zero_recovery[index[2]],
+            'mix_uplift': mix_uplift[index[3]],
+            'receita_atual': current,
+            'receita_projetada': current + increase,
+            'incremento': increase,
+            'incremento_pct': increase_pct
+        })
+
+    @cached_result
     def calculate_scenarios(self):
-        """Calculate different business scenarios (com filtro de data)"""
-        current_metrics = self.get_revenue_metrics()
-        current_revenue = current_metrics.get('total_revenue', 0)
-
-        zero_sales_df = self.get_zero_sales_analysis()
-        avg_price = current_metrics.get('avg_price', 0)
-        potential_units = zero_sales_df['venda_concorrente'].sum() * 0.5 if not zero_sales_df.empty else 0
-        scenario_1_revenue = current_revenue + (potential_units * avg_price)
+        """Calculate different business scenarios (com filtro de data)
 
-        current_share = self.get_market_share_metrics().get('avg_share', 0)
-        share_increase = 0.05
-        scenario_2_revenue = current_revenue * (1 + (share_increase / current_share)) if current_share > 0 else current_revenue
-
-        unique_products = current_metrics.get('unique_products', 0)
-        top_n = max(1, int(unique_products * 0.2)) if unique_products > 0 else 20
-        top_products = self.get_top_products(top_n=top_n)
-        top_revenue = top_products['receita'].sum() if not top_products.empty else 0
-        scenario_3_revenue = current_revenue + (top_revenue * 0.2)
+        Each scenario moves one SCENARIO_DEFAULTS lever; the 2 x 2 x 2 grid is
+        evaluated in a single get_scenario_grid call.
+        """
+        grid = self.get_scenario_grid(**{name: (0.0, value) for name, value in SCENARIO_DEFAULTS.items()})
+        if grid.empty:
+            return {'current': 0, 'reduce_zero_sales': 0, 'increase_share': 0, 'optimize_mix': 0}
 
+        projected = grid.set_index(['share_uplift', 'zero_recovery', 'mix_uplift'])['receita_projetada']
+        share, zero, mix = (SCENARIO_DEFAULTS[name] for name in ('share_uplift', 'zero_recovery', 'mix_uplift'))
         scenarios = {
-            'current': current_revenue,
-            'reduce_zero_sales': scenario_1_revenue,
-            'increase_share': scenario_2_revenue,
-            'optimize_mix': scenario_3_revenue
+            'current': projected[(0.0, 0.0, 0.0)],
+            'reduce_zero_sales': projected[(0.0, zero, 0.0)],
+            'increase_share': projected[(share, 0.0, 0.0)],
+            'optimize_mix': projected[(0.0, 0.0, mix)]
         }
 
         return scenarios
 
+    @cached_result
     def generate_insights(self):
         """Generate automated insights"""
+        return self._insights(self.get_growth_rates(), self.get_market_share_metrics(),
+                              self.get_channel_performance(), self.get_category_performance(),
+                              self.get_state_performance(), self.dimension_filters)
+
+    @staticmethod
+    def _insights(growth, share_metrics, channel_perf, category_perf, state_perf, filters=None):
+        """Automated insights from already computed metrics and breakdowns
+
+        Breakdowns of a filtered dimension (canal, neogrupo, uf) give no
+        insight (the kept value has 100%) and are skipped; share insights are
+        marked national when the IQVIA metrics ignore the filters, and skipped
+        when there are none (no IQVIA month in the period).
+        """
+        filters = filters or {}
+        scope = ' (nacional)' if share_metrics.get('national') else ''
         insights = []
 
-        revenue_metrics = self.get_revenue_metrics()
-        growth = self.get_growth_rates()
-
         if growth['revenue_growth'] > 10:
             insights.append({
                 'type': 'positive',
@@ -469,24 +2245,21 @@ class OptimizedDataProcessor:
                 'message': f'Queda de {abs(growth["revenue_growth"]):.1f}% na receita - requer atenção'
             })
 
-        share_metrics = self.get_market_share_metrics()
-
         if share_metrics.get('zero_sales_rate', 0) > 0.30:
             insights.append({
                 'type': 'warning',
                 'category': 'Market Share',
-                'message': f'{share_metrics["zero_sales_rate"]*100:.1f}% das oportunidades têm venda zero - grande potencial de melhoria'
+                'message': f'{share_metrics["zero_sales_rate"]*100:.1f}% das oportunidades têm venda zero{scope} - grande potencial de melhoria'
             })
 
-        if share_metrics.get('avg_share', 0) < 0.40:
+        if 'avg_share' in share_metrics and share_metrics['avg_share'] < 0.40:
             insights.append({
                 'type': 'warning',
                 'category': 'Market Share',
-                'message': f'Market share de {share_metrics["avg_share"]*100:.1f}% abaixo da meta de 40%'
+                'message': f'Market share{scope} de {share_metrics["avg_share"]*100:.1f}% abaixo da meta de 40%'
             })
 
-        channel_perf = self.get_channel_performance()
-        if not channel_perf.empty:
+        if not channel_perf.empty and 'canal' not in filters:
             app_data = channel_perf[channel_perf['canal'] == 'App']
             if not app_data.empty:
                 app_pct = app_data['pct_receita'].values[0]
@@ -497,8 +2270,7 @@ class OptimizedDataProcessor:
                         'message': f'App dominando com {app_pct:.1f}% da receita - estratégia mobile validada'
                     })
 
-        category_perf = self.get_category_performance()
-        if not category_perf.empty:
+        if not category_perf.empty and 'neogrupo' not in filters:
             top_category = category_perf.iloc[0]
             insights.append({
                 'type': 'info',
@@ -506,8 +2278,7 @@ class OptimizedDataProcessor:
                 'message': f'{top_category["categoria"]} lidera com {top_category["pct_receita"]:.1f}% da receita'
             })
 
-        state_perf = self.get_state_performance()
-        if not state_perf.empty:
+        if not state_perf.empty and 'uf' not in filters:
             sp_data = state_perf[state_perf['estado'] == 'SP']
             if not sp_data.empty:
                 sp_pct = sp_data['pct_receita'].values[0]
@@ -520,34 +2291,93 @@ class OptimizedDataProcessor:
 
         return insights
 
+    def get_dashboard_bundle(self, filters=None, top_n=20, periods=3):
+        """Every KPI, trend and breakdown of the sidebar and tab1 for one filter state
+
+        filters (set_filters keyword arguments) are applied to a view of the
+        processor (with_filters), so its own filters are left untouched;
+        without them the active filters are used. Each piece comes from its
+        getter once, sharing the filter selection resolved for the state, and
+        growth rates and insights are derived from those pieces instead of
+        calling their getters (and the getters those call) again. The bundle
+        is cached per filter state like the getters.
+        """
+        source = self.with_filters(**filters) if filters is not None else self
+        return source._dashboard_bundle(top_n, periods)
+
+    @cached_result
+    def _dashboard_bundle(self, top_n, periods):
+        bundle = {
+            'revenue_metrics': self.get_revenue_metrics(),
+            'market_share_metrics': self.get_market_share_metrics(),
+            'revenue_trend': self.get_revenue_trend(),
+            'market_share_trend': self.get_market_share_trend(),
+            'channel_performance': self.get_channel_performance(),
+            'category_performance': self.get_category_performance(),
+            'state_performance': self.get_state_performance(),
+            'top_products': self.get_top_products(top_n=top_n),
+            'zero_sales': self.get_zero_sales_analysis(),
+            'abc_products': self.get_abc_analysis()
+        }
+        bundle['growth_rates'] = self._growth_rates(bundle['revenue_trend'], bundle['market_share_trend'],
+                                                    periods)
+        bundle['insights'] = self._insights(bundle['growth_rates'], bundle['market_share_metrics'],
+                                            bundle['channel_performance'], bundle['category_performance'],
+                                            bundle['state_performance'], self.dimension_filters)
+        return bundle
+
     def set_date_filter(self, start_date, end_date):
         """Define filtro de datas para análises"""
         self.date_filter_start = pd.Timestamp(start_date)
         self.date_filter_end = pd.Timestamp(end_date)
 
-    def _apply_date_filter_pricing(self, df):
-        """Aplica filtro de data no dataframe de preços"""
-        if self.date_filter_start is None or self.date_filter_end is None:
-            return df
-        return df[(df['mes'] >= self.date_filter_start) & (df['mes'] <= self.date_filter_end)]
+    def set_filters(self, start_date=None, end_date=None, **dimensions):
+        """Define todos os filtros de uma vez: período + canal, uf, neogrupo e produto
 
-    def _apply_date_filter_iqvia(self, df):
-        """Aplica filtro de data no dataframe IQVIA"""
-        if self.date_filter_start is None or self.date_filter_end is None:
-            return df
-        return df[(df['data'] >= self.date_filter_start) & (df['data'] <= self.date_filter_end)]
+        Each dimension takes a value or a list of values; None (or leaving it
+        out) means no constraint. The previous filters are replaced.
+        """
+        unknown = sorted(set(dimensions) - set(FILTER_DIMS))
+        if unknown:
+            raise ValueError(f"Filtro desconhecido: {', '.join(unknown)} (opções: {', '.join(FILTER_DIMS)})")
+
+        if start_date is None or end_date is None:
+            self.date_filter_start = self.date_filter_end = None
+        else:
+            self.set_date_filter(start_date, end_date)
+
+        self.dimension_filters = {dim: _filter_values(values)
+                                  for dim, values in dimensions.items() if values is not None}
+
+    def clear_filters(self):
+        """Remove os filtros de período e de dimensões"""
+        self.set_filters()
+
+    def with_filters(self, start_date=None, end_date=None, **dimensions):
+        """View of the processor with its own filters (set_filters arguments)
+
+        The view shares the loaded data, indexes and result cache, so it is
+        cheap to create per request, and the processor's filters are left
+        untouched: a processor shared between sessions keeps no session's
+        filters. Data loaded on demand later (the IQVIA cube) is loaded on the
+        origin processor and shared with every view.
+        """
+        view = copy.copy(self)
+        view.view_of = self.view_of or self
+        view.set_filters(start_date, end_date, **dimensions)
+        return view
 
     def get_filtered_pricing_data(self):
-        """Retorna dados de preços filtrados por data"""
+        """Retorna dados de preços filtrados (período e dimensões)"""
         if self.pricing_data is None:
             return pd.DataFrame()
-        return self._apply_date_filter_pricing(self.pricing_data)
+        return self._apply_filters(self.pricing_data, 'mes')
 
     def get_filtered_iqvia_data(self):
-        """Retorna dados IQVIA filtrados por data"""
+        """Retorna dados IQVIA filtrados (período e produtos/categorias)"""
         if self.iqvia_data is None:
             return pd.DataFrame()
-        return self._apply_date_filter_iqvia(self.iqvia_data)
+        return self._apply_filters(self.iqvia_data, 'data')
 
 
 if __name__ == "__main__":
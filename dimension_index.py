@@ -0,0 +1,82 @@
+"""
+Per-value row indexes for filtering a frame by dimension values
+Every column gets its rows grouped by value (CSR over the value codes);
+low-cardinality columns also get one packed bitmap per value, so combined
+filters are byte-wise ANDs instead of chained boolean masks
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas com até esta quantidade de valores ganham um bitmap por valor
+BITMAP_MAX_VALUES = 64
+
+
+class DimensionIndex:
+    """Row index of a frame over the given columns, built once per frame"""
+
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self.columns = {}
+        for col in columns:
+            codes, values = pd.factorize(df[col], sort=True)
+            valid = codes >= 0
+            counts = np.bincount(codes[valid], minlength=len(values))
+            # Linhas agrupadas por valor (ordem original dentro de cada valor); nulos ficam fora
+            order = np.argsort(codes, kind='stable')[len(codes) - int(valid.sum()):]
+            offsets = np.r_[0, np.cumsum(counts)]
+
+            bitmaps = None
+            if len(values) <= BITMAP_MAX_VALUES:
+                bitmaps = np.zeros((len(values), (self.n_rows + 7) // 8), dtype=np.uint8)
+                for code in range(len(values)):
+                    bitmaps[code] = np.packbits(codes == code)
+            self.columns[col] = (pd.Index(values), order, offsets, bitmaps)
+
+    @property
+    def nbytes(self):
+        return int(sum(order.nbytes + offsets.nbytes + (bitmaps.nbytes if bitmaps is not None else 0)
+                       for _, order, offsets, bitmaps in self.columns.values()))
+
+    @staticmethod
+    def _bit_set(bitmap, positions):
+        """Whether each row position has its bit set in a packed bitmap"""
+        return ((bitmap[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1).astype(bool)
+
+    def select(self, filters, rows=None):
+        """Sorted row positions matching every filter ({column: values})
+
+        Values of a column are ORed, columns are ANDed. rows narrows the result
+        to a (start, stop) range or to given sorted positions.
+        """
+        bitmap, positions = None, None
+        for col, values in filters.items():
+            index, order, offsets, bitmaps = self.columns[col]
+            codes = index.get_indexer(pd.Index(list(values)))
+            codes = codes[codes >= 0]
+            if bitmaps is not None:
+                selected = (np.bitwise_or.reduce(bitmaps[codes], axis=0) if len(codes)
+                            else np.zeros(bitmaps.shape[1], dtype=np.uint8))
+                bitmap = selected if bitmap is None else bitmap & selected
+            else:
+                parts = [order[offsets[code]:offsets[code + 1]] for code in codes]
+                selected = np.sort(np.concatenate(parts)) if parts else np.array([], dtype=np.int64)
+                positions = selected if positions is None else np.intersect1d(positions, selected,
+                                                                              assume_unique=True)
+
+        start, stop = rows if isinstance(rows, tuple) else (0, self.n_rows)
+        if positions is None:
+            if bitmap is None:
+                positions = np.arange(start, stop)
+            else:
+                # Desempacotar só os bytes do intervalo de linhas
+                low = start // 8
+                positions = np.flatnonzero(np.unpackbits(bitmap[low:(stop + 7) // 8])) + low * 8
+                bitmap = None
+        positions = positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)]
+
+        if bitmap is not None:
+            positions = positions[self._bit_set(bitmap, positions)]
+        if rows is not None and not isinstance(rows, tuple):
+            positions = np.intersect1d(positions, rows, assume_unique=True)
+        return positions
@@ -0,0 +1,322 @@
+"""
+Out-of-core DuckDB backend for the raw IQVIA history
+Same get_* interface as OptimizedDataProcessor, answered with SQL over the
+monthly parquet files in-process, spilling to disk under a memory limit
+"""
+
+import os
+
+import pandas as pd
+
+from data_processor_optimized import (OptimizedDataProcessor, IQVIA_LAYOUT_DIR, IQVIA_REQUIRED_COLS,
+                                      weighted_share)
+from result_cache import cached_result
+
+try:
+    import duckdb
+except ImportError:  # Backend opcional: pip install duckdb
+    duckdb = None
+
+# Subdiretório do cache para o snapshot e o spill do DuckDB
+DUCKDB_CACHE_DIR = "duckdb"
+
+
+def _sql_string(value):
+    """Quoted SQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_in(column, values):
+    """column IN (...) with the codes inlined as integers, so DuckDB prunes row groups"""
+    values = pd.unique(pd.Series(values if pd.api.types.is_list_like(values) else [values]).astype('int64'))
+    if not len(values):
+        return "FALSE"
+    return f"{column} IN ({', '.join(str(value) for value in values)})"
+
+
+def _sql_column(column):
+    """Validated raw IQVIA column name for a GROUP BY"""
+    if column not in IQVIA_REQUIRED_COLS:
+        raise ValueError(f"Coluna IQVIA inválida: {column}")
+    return column
+
+
+class DuckDBProcessor(OptimizedDataProcessor):
+    """OptimizedDataProcessor whose IQVIA getters run on the raw rows in DuckDB
+
+    None of the raw history is held in pandas: every IQVIA query streams over
+    the parquet files (or the relayout_iqvia.py dataset), with filters pushed
+    into the scan and large aggregations spilling to disk past the memory limit
+    (RD_DUCKDB_MEMORY_LIMIT, else RD_MEMORY_BUDGET). Store and brick counts are
+    exact. iqvia_data holds only the (id_periodo, cd_produto) sums and counts
+    ('count' grain); pricing stays in pandas.
+    """
+
+    def __init__(self, data_dir=".", memory_limit=None, threads=None, backend=None):
+        if duckdb is None:
+            raise ImportError("DuckDBProcessor requer o pacote duckdb (pip install duckdb)")
+        super().__init__(data_dir, backend)
+        # Snapshot próprio: não misturar com o agregado completo do processador pandas
+        self.cache_dir = self.cache_dir / DUCKDB_CACHE_DIR
+        self.iqvia_grain = 'count'
+
+        if memory_limit is None:
+            memory_limit = os.getenv('RD_DUCKDB_MEMORY_LIMIT')
+        if memory_limit is None and self._memory_budget() is not None:
+            memory_limit = f"{self._memory_budget() // 2 ** 20}MB"
+        if threads is None:
+            threads = int(os.getenv('RD_DUCKDB_THREADS', '0')) or None
+
+        self.con = duckdb.connect(database=':memory:')
+        self.con.execute(f"SET temp_directory = {_sql_string((self.cache_dir / 'spill').as_posix())}")
+        self.con.execute("SET preserve_insertion_order = false")
+        if memory_limit:
+            self.con.execute(f"SET memory_limit = {_sql_string(memory_limit)}")
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+
+    def _iqvia_source(self):
+        """read_parquet() over the re-laid-out dataset if current, else the month files"""
+        if self._iqvia_layout() is not None:
+            pattern = (self.data_dir / IQVIA_LAYOUT_DIR / '**' / '*.parquet').as_posix()
+            return f"read_parquet({_sql_string(pattern)}, hive_partitioning = true)"
+        files = self._iqvia_month_files()
+        if not files:
+            return None
+        return f"read_parquet([{', '.join(_sql_string(file.as_posix()) for file in files)}])"
+
+    def _iqvia_where(self, periods=None, products=None, stores=None, bricks=None, date_filter=True):
+        """WHERE clause for the filters
+
+        With date_filter, periods defaults to the active date filter and products
+        is narrowed by the active produto/neogrupo filters.
+        """
+        if date_filter:
+            if periods is None:
+                periods = self._date_filter_periods()
+            products = self._filter_products(products)
+
+        conditions = []
+        if periods is not None:
+            if isinstance(periods, tuple) and len(periods) == 2:
+                conditions.append(f"id_periodo BETWEEN {int(periods[0])} AND {int(periods[1])}")
+            else:
+                conditions.append(_sql_in('id_periodo', periods))
+        for column, values in (('cd_produto', products), ('cd_filial', stores), ('cd_brick', bricks)):
+            if values is not None:
+                conditions.append(_sql_in(column, values))
+        return ' AND '.join(conditions) or 'TRUE'
+
+    def _iqvia_query(self, select, periods=None, products=None, stores=None, bricks=None,
+                     date_filter=True):
+        """Run select against a filtered `iqvia` relation -> DataFrame (empty if no files)"""
+        source = self._iqvia_source()
+        if source is None:
+            return pd.DataFrame()
+        where = self._iqvia_where(periods, products, stores, bricks, date_filter)
+        return self.con.execute(
+            f"WITH iqvia AS (SELECT * FROM {source} WHERE {where}) {select}"
+        ).df()
+
+    @staticmethod
+    def _with_period_date(df):
+        df['data'] = pd.to_datetime(df['id_periodo'].astype(str), format='%Y%m')
+        return df
+
+    def load_iqvia_all(self, streaming=None, batch_size=None, workers=None, worker_memory_mb=None):
+        """Aggregate the raw history to (id_periodo, cd_produto) inside DuckDB
+
+        Only sums and exact distinct counts are kept ('count' grain); the loader
+        options of the pandas processor do not apply.
+        """
+        print("Carregando IQVIA (TODOS os meses de 2025, agregação no DuckDB)...")
+        iqvia_data = self._iqvia_query("""
+            SELECT id_periodo, cd_produto,
+                   sum(venda_rd)::BIGINT AS venda_rd,
+                   sum(venda_concorrente)::BIGINT AS venda_concorrente,
+                   count(DISTINCT cd_filial) AS cd_filial,
+                   count(DISTINCT cd_brick) AS cd_brick
+            FROM iqvia
+            WHERE id_periodo BETWEEN 202501 AND 202509
+            GROUP BY id_periodo, cd_produto
+            ORDER BY id_periodo, cd_produto
+        """, date_filter=False)
+        if iqvia_data.empty:
+            print("⚠️  Nenhum arquivo IQVIA encontrado!")
+            return pd.DataFrame()
+
+        iqvia_data.insert(2, 'share', weighted_share(iqvia_data['venda_rd'], iqvia_data['venda_concorrente']))
+        self.iqvia_data = self._with_period_date(iqvia_data)
+        self.store_index = self._iqvia_query(
+            "SELECT DISTINCT cd_filial FROM iqvia ORDER BY cd_filial", date_filter=False
+        )['cd_filial'].to_numpy()
+        self.iqvia_grain = 'count'
+        self._invalidate_results()
+
+        print(f"✓ IQVIA agregado no DuckDB: {len(self.iqvia_data):,} registros, "
+              f"{len(self.store_index):,} lojas")
+        return self.iqvia_data
+
+    def ingest_iqvia_months(self, month_files, stale_periods=(), **_):
+        """Re-aggregate in DuckDB (a full pass streams the files, no month state to merge)"""
+        self.load_iqvia_all()
+        self._precompute_iqvia_aggregations()
+        return self.iqvia_data
+
+    @cached_result
+    def get_market_share_metrics(self):
+        """Market share metrics with exact distinct stores/bricks (com filtro de data)"""
+        df = self._iqvia_query("""
+            SELECT sum(venda_rd)::BIGINT AS total_rd,
+                   sum(venda_concorrente)::BIGINT AS total_competitor,
+                   count(DISTINCT cd_produto) AS unique_products,
+                   count(DISTINCT cd_filial) AS unique_stores,
+                   count(DISTINCT cd_brick) AS unique_bricks,
+                   count(*) AS n_rows
+            FROM iqvia
+        """)
+        if df.empty or df['n_rows'].iloc[0] == 0:
+            return {}
+        row = df.iloc[0]
+
+        # Taxa de zero na mesma unidade do agregado: células (mês, produto) sem venda RD
+        zero_rate = self._iqvia_query("""
+            SELECT avg((venda_rd = 0)::DOUBLE) AS zero_sales_rate
+            FROM (SELECT sum(venda_rd) AS venda_rd FROM iqvia GROUP BY id_periodo, cd_produto)
+        """)['zero_sales_rate'].iloc[0]
+
+        return {
+            'avg_share': weighted_share(row['total_rd'], row['total_competitor']),
+            'total_rd_sales': int(row['total_rd']),
+            'total_competitor_sales': int(row['total_competitor']),
+            'zero_sales_rate': float(zero_rate),
+            'unique_products': int(row['unique_products']),
+            'unique_stores': int(row['unique_stores']),
+            'unique_bricks': int(row['unique_bricks'])
+        }
+
+    @cached_result
+    def get_unique_coverage(self, by='data'):
+        """Exact distinct stores/bricks per group (com filtro de data)
+
+        by is 'data', any raw IQVIA column, or 'categoria' (pricing neogrupo).
+        """
+        if by == 'categoria':
+            if self.pricing_data is None:
+                return pd.DataFrame()
+            categories = self.pricing_data.groupby('produto')['neogrupo'].first().astype(str)
+            self.con.register('categorias', categories.rename_axis('cd_produto').reset_index())
+            select = """
+                SELECT c.neogrupo AS categoria,
+                       count(DISTINCT i.cd_filial) AS unique_stores,
+                       count(DISTINCT i.cd_brick) AS unique_bricks
+                FROM iqvia i JOIN categorias c USING (cd_produto)
+                GROUP BY 1 ORDER BY 1
+            """
+        else:
+            key = 'id_periodo' if by == 'data' else _sql_column(by)
+            select = f"""
+                SELECT {key}, count(DISTINCT cd_filial) AS unique_stores,
+                       count(DISTINCT cd_brick) AS unique_bricks
+                FROM iqvia GROUP BY 1 ORDER BY 1
+            """
+
+        result = self._iqvia_query(select)
+        if by == 'data' and not result.empty:
+            result = self._with_period_date(result)[['data', 'unique_stores', 'unique_bricks']]
+        return result
+
+    @cached_result
+    def get_market_share_trend(self):
+        """Volume-weighted share per month (com filtro de data)"""
+        result = self._iqvia_query("""
+            SELECT id_periodo, sum(venda_rd)::BIGINT AS venda_rd,
+                   sum(venda_concorrente)::BIGINT AS venda_concorrente
+            FROM iqvia GROUP BY 1 ORDER BY 1
+        """)
+        if result.empty:
+            return pd.DataFrame()
+
+        result = self._with_period_date(result)[['data', 'venda_rd', 'venda_concorrente']]
+        result.insert(1, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+        return result
+
+    @cached_result
+    def get_zero_sales_analysis(self):
+        """Store-level zero sales per product: competitor volume and exact stores (com filtro de data)"""
+        result = self._iqvia_query("""
+            SELECT cd_produto AS produto,
+                   sum(venda_concorrente)::BIGINT AS venda_concorrente,
+                   count(DISTINCT cd_filial) AS lojas_afetadas
+            FROM iqvia
+            WHERE venda_rd = 0 AND venda_concorrente > 0
+            GROUP BY 1
+            ORDER BY venda_concorrente DESC
+        """)
+        return result if not result.empty else pd.DataFrame()
+
+    @cached_result
+    def get_store_coverage(self, products=None, how='any'):
+        """Exact store coverage from the raw rows (com filtro de data)
+
+        how='any' counts stores in any selected month, how='all' only those that
+        qualify in every month present in the selection.
+        """
+        if how == 'all':
+            select = """
+                SELECT count(*) FILTER (WHERE meses = n) AS lojas_com_produto,
+                       count(*) FILTER (WHERE meses_zero = n) AS lojas_venda_zero,
+                       count(*) AS lojas_selecao
+                FROM (SELECT cd_filial,
+                             count(DISTINCT id_periodo) AS meses,
+                             count(DISTINCT id_periodo) FILTER (WHERE venda_rd = 0) AS meses_zero
+                      FROM iqvia GROUP BY cd_filial),
+                     (SELECT count(DISTINCT id_periodo) AS n FROM iqvia)
+            """
+        else:
+            select = """
+                SELECT count(DISTINCT cd_filial) AS lojas_com_produto,
+                       count(DISTINCT cd_filial) FILTER (WHERE venda_rd = 0) AS lojas_venda_zero,
+                       count(DISTINCT cd_filial) AS lojas_selecao
+                FROM iqvia
+            """
+        df = self._iqvia_query(select, products=products)
+        if df.empty:
+            return {}
+
+        coverage = {name: int(value) for name, value in df.iloc[0].items()}
+        if coverage.pop('lojas_selecao') == 0:
+            return {}
+        coverage['lojas_total'] = len(self.store_index) if self.store_index is not None else None
+        return coverage
+
+    @cached_result
+    def get_iqvia_drilldown(self, products=None, stores=None, bricks=None, by='cd_brick'):
+        """Raw-granularity IQVIA view by month and store/brick (com filtro de data)"""
+        result = self._iqvia_query(f"""
+            SELECT id_periodo, {_sql_column(by)}, sum(venda_rd)::BIGINT AS venda_rd,
+                   sum(venda_concorrente)::BIGINT AS venda_concorrente,
+                   count(DISTINCT cd_produto) AS produtos
+            FROM iqvia GROUP BY 1, 2 ORDER BY 1, 2
+        """, products=products, stores=stores, bricks=bricks)
+        if result.empty:
+            return pd.DataFrame()
+
+        result.insert(2, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+        return self._with_period_date(result)
+
+    @cached_result
+    def get_geo_share(self, level='cd_brick', products=None, stores=None, bricks=None):
+        """Brick- or store-level (level='cd_filial') share from the raw rows (com filtro de data)"""
+        result = self._iqvia_query(f"""
+            SELECT {_sql_column(level)}, sum(venda_rd)::BIGINT AS venda_rd,
+                   sum(venda_concorrente)::BIGINT AS venda_concorrente
+            FROM iqvia GROUP BY 1
+            HAVING sum(venda_rd) + sum(venda_concorrente) > 0
+            ORDER BY venda_concorrente DESC
+        """, products=products, stores=stores, bricks=bricks)
+        if result.empty:
+            return pd.DataFrame()
+
+        result.insert(1, 'share', weighted_share(result['venda_rd'], result['venda_concorrente']))
+        return result
@@ -0,0 +1,276 @@
+"""
+Sparse store x brick x product IQVIA cube
+One CSR block per month: rows are integer-coded stores, entries hold the
+product/brick codes and int32 venda_rd / venda_concorrente
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+CUBE_VERSION = 1
+CUBE_ARRAYS = ['indptr', 'product', 'brick', 'venda_rd', 'venda_concorrente']
+
+
+def _code_dtype(n):
+    """Smallest unsigned dtype that holds codes 0..n-1"""
+    return np.uint16 if n <= np.iinfo(np.uint16).max else np.uint32
+
+
+def _period_of(file):
+    return int(Path(file).stem.split('_')[-1])
+
+
+def concat_ranges(starts, ends):
+    """Concatenation of arange(start, end) for every pair, without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.array([], dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(total)
+
+
+class IqviaCube:
+    """Per-month CSR cube over (store, product) with the brick of each entry"""
+
+    def __init__(self, stores, bricks, products, store_bricks, blocks):
+        self.stores = stores              # cd_filial ordenados (código = posição)
+        self.bricks = bricks              # cd_brick ordenados
+        self.products = products          # cd_produto ordenados
+        self.store_bricks = store_bricks  # pares loja*len(bricks)+brick presentes
+        self.blocks = blocks              # {id_periodo: {array: ndarray}}
+
+    @property
+    def periods(self):
+        return sorted(self.blocks)
+
+    @property
+    def nbytes(self):
+        """Memory of the cube arrays (mapped pages count only once touched)"""
+        return sum(array.nbytes for block in self.blocks.values() for array in block.values())
+
+    @classmethod
+    def build(cls, month_files, batch_size=1_000_000):
+        """Build the cube in two streaming passes over the raw month files
+
+        Pass 1 reads the key columns to build the dictionaries and the number of
+        entries per store; pass 2 scatters each batch straight into its CSR slot,
+        so peak memory is the cube plus one batch. The distinct values of each
+        batch are kept and deduplicated once at the end of the pass.
+        """
+        store_parts, brick_parts, product_parts = [], [], []
+        store_counts = {}
+        for file in month_files:
+            dataset = ds.dataset(file, format='parquet')
+            month_counts = []
+            for batch in dataset.to_batches(columns=['cd_filial', 'cd_brick', 'cd_produto'],
+                                            batch_size=batch_size):
+                values, counts = np.unique(batch.column(0).to_numpy(), return_counts=True)
+                store_parts.append(values)
+                month_counts.append((values, counts))
+                brick_parts.append(np.unique(batch.column(1).to_numpy()))
+                product_parts.append(np.unique(batch.column(2).to_numpy()))
+            store_counts[_period_of(file)] = month_counts
+
+        stores, bricks, products = (np.unique(np.concatenate(parts)) if parts else np.array([], dtype=np.int64)
+                                    for parts in (store_parts, brick_parts, product_parts))
+        del store_parts, brick_parts, product_parts
+
+        product_dtype, brick_dtype = _code_dtype(len(products)), _code_dtype(len(bricks))
+        store_brick_parts = []
+        blocks = {}
+        for file in month_files:
+            period = _period_of(file)
+            counts = np.zeros(len(stores), dtype=np.int64)
+            for values, value_counts in store_counts.pop(period):
+                counts[np.searchsorted(stores, values)] += value_counts
+            indptr = np.concatenate([[0], np.cumsum(counts)])
+
+            n = int(indptr[-1])
+            block = {
+                'indptr': indptr,
+                'product': np.empty(n, dtype=product_dtype),
+                'brick': np.empty(n, dtype=brick_dtype),
+                'venda_rd': np.empty(n, dtype=np.int32),
+                'venda_concorrente': np.empty(n, dtype=np.int32)
+            }
+
+            # Próxima posição livre de cada loja no CSR
+            fill = indptr[:-1].copy()
+            dataset = ds.dataset(file, format='parquet')
+            for batch in dataset.to_batches(
+                    columns=['cd_filial', 'cd_brick', 'cd_produto', 'venda_rd', 'venda_concorrente'],
+                    batch_size=batch_size):
+                store_codes = np.searchsorted(stores, batch.column(0).to_numpy())
+                order = np.argsort(store_codes, kind='stable')
+                sorted_codes = store_codes[order]
+                rank = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes, side='left')
+                dest = fill[sorted_codes] + rank
+
+                brick_codes = np.searchsorted(bricks, batch.column(1).to_numpy()[order])
+                block['brick'][dest] = brick_codes
+                store_brick_parts.append(np.unique(sorted_codes * len(bricks) + brick_codes))
+                block['product'][dest] = np.searchsorted(products, batch.column(2).to_numpy()[order])
+                for i, name in ((3, 'venda_rd'), (4, 'venda_concorrente')):
+                    values = batch.column(i).to_numpy()[order]
+                    if len(values) and values.max() > np.iinfo(np.int32).max:
+                        raise OverflowError(f"{name} não cabe em int32 em {file}")
+                    block[name][dest] = values
+                fill += np.bincount(store_codes, minlength=len(stores))
+            blocks[period] = block
+
+        store_bricks = np.unique(np.concatenate(store_brick_parts)) if store_brick_parts \
+            else np.array([], dtype=np.int64)
+        return cls(stores, bricks, products, store_bricks, blocks)
+
+    def save(self, path, sources=None):
+        """Write the cube as .npy files, atomically replacing any previous cube"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-cube-", dir=path.parent))
+        try:
+            for name in ('stores', 'bricks', 'products', 'store_bricks'):
+                np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+            for period, block in self.blocks.items():
+                for name, array in block.items():
+                    np.save(tmp_dir / f"{period}_{name}.npy", array)
+            with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+                json.dump({'version': CUBE_VERSION, 'periods': self.periods,
+                           'sources': sources or {}}, f, indent=2)
+
+            old_dir = path.parent / f".old-{path.name}"
+            shutil.rmtree(old_dir, ignore_errors=True)
+            if path.exists():
+                os.rename(path, old_dir)
+            os.rename(tmp_dir, path)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def read_meta(path):
+        """meta.json of a saved cube, or None"""
+        try:
+            with open(Path(path) / "meta.json", encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == CUBE_VERSION else None
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved cube"""
+        path = Path(path)
+        meta = cls.read_meta(path)
+        dictionaries = [np.load(path / f"{name}.npy")
+                        for name in ('stores', 'bricks', 'products', 'store_bricks')]
+        blocks = {period: {name: np.load(path / f"{period}_{name}.npy", mmap_mode='r')
+                           for name in CUBE_ARRAYS}
+                  for period in meta['periods']}
+        return cls(*dictionaries, blocks)
+
+    def _store_codes_for_bricks(self, brick_codes):
+        """Store codes that have any entry in the given bricks"""
+        pair_bricks = self.store_bricks % len(self.bricks)
+        return np.unique(self.store_bricks[np.isin(pair_bricks, brick_codes)] // len(self.bricks))
+
+    @staticmethod
+    def _encode(dictionary, values):
+        """Codes of the values present in a sorted dictionary"""
+        values = np.atleast_1d(values)
+        codes = np.searchsorted(dictionary, values)
+        codes = np.clip(codes, 0, len(dictionary) - 1)
+        return codes[dictionary[codes] == values]
+
+    def _entries(self, period, store_codes=None, brick_codes=None, product_codes=None):
+        """Store code and arrays of the matching entries of one month"""
+        block = self.blocks[period]
+        indptr = block['indptr']
+
+        if store_codes is None:
+            rows = slice(None)
+            store_of_entry = np.repeat(np.arange(len(self.stores)), np.diff(indptr))
+        else:
+            # Fatiar o CSR: só as faixas das lojas pedidas são tocadas
+            starts, ends = indptr[store_codes], indptr[store_codes + 1]
+            rows = concat_ranges(starts, ends)
+            store_of_entry = np.repeat(store_codes, ends - starts)
+
+        entries = {name: np.asarray(block[name][rows]) for name in CUBE_ARRAYS[1:]}
+        mask = np.ones(len(store_of_entry), dtype=bool)
+        if brick_codes is not None:
+            mask &= np.isin(entries['brick'], brick_codes)
+        if product_codes is not None:
+            mask &= np.isin(entries['product'], product_codes)
+        if not mask.all():
+            store_of_entry = store_of_entry[mask]
+            entries = {name: values[mask] for name, values in entries.items()}
+        return store_of_entry, entries
+
+    def _select(self, periods, stores, bricks, products):
+        """Resolve filters to periods and dictionary codes"""
+        if periods is None:
+            periods = self.periods
+        elif isinstance(periods, tuple) and len(periods) == 2:
+            periods = [p for p in self.periods if periods[0] <= p <= periods[1]]
+        else:
+            periods = [p for p in np.atleast_1d(periods).tolist() if p in self.blocks]
+
+        brick_codes = self._encode(self.bricks, bricks) if bricks is not None else None
+        store_codes = self._encode(self.stores, stores) if stores is not None else None
+        if brick_codes is not None:
+            brick_stores = self._store_codes_for_bricks(brick_codes)
+            store_codes = brick_stores if store_codes is None else np.intersect1d(store_codes, brick_stores)
+        product_codes = self._encode(self.products, products) if products is not None else None
+        return periods, store_codes, brick_codes, product_codes
+
+    def slice(self, periods=None, stores=None, bricks=None, products=None):
+        """Entries matching the filters, decoded back to IQVIA codes"""
+        periods, store_codes, brick_codes, product_codes = self._select(periods, stores, bricks, products)
+
+        frames = []
+        for period in periods:
+            store_of_entry, entries = self._entries(period, store_codes, brick_codes, product_codes)
+            frames.append(pd.DataFrame({
+                'id_periodo': period,
+                'cd_filial': self.stores[store_of_entry],
+                'cd_brick': self.bricks[entries['brick']],
+                'cd_produto': self.products[entries['product']],
+                'venda_rd': entries['venda_rd'],
+                'venda_concorrente': entries['venda_concorrente']
+            }))
+        if not frames:
+            return pd.DataFrame(columns=['id_periodo', 'cd_filial', 'cd_brick', 'cd_produto',
+                                         'venda_rd', 'venda_concorrente'])
+        return pd.concat(frames, ignore_index=True)
+
+    def sales_by(self, level='cd_brick', periods=None, stores=None, bricks=None, products=None):
+        """Summed venda_rd / venda_concorrente per brick, store or product (bincount per month)"""
+        periods, store_codes, brick_codes, product_codes = self._select(periods, stores, bricks, products)
+        dictionary = {'cd_brick': self.bricks, 'cd_filial': self.stores, 'cd_produto': self.products}[level]
+
+        venda_rd = np.zeros(len(dictionary), dtype=np.int64)
+        venda_concorrente = np.zeros(len(dictionary), dtype=np.int64)
+        for period in periods:
+            store_of_entry, entries = self._entries(period, store_codes, brick_codes, product_codes)
+            codes = {'cd_brick': entries['brick'], 'cd_filial': store_of_entry,
+                     'cd_produto': entries['product']}[level]
+            venda_rd += np.bincount(codes, weights=entries['venda_rd'],
+                                    minlength=len(dictionary)).astype(np.int64)
+            venda_concorrente += np.bincount(codes, weights=entries['venda_concorrente'],
+                                             minlength=len(dictionary)).astype(np.int64)
+
+        present = (venda_rd + venda_concorrente) > 0
+        return pd.DataFrame({
+            level: dictionary[present],
+            'venda_rd': venda_rd[present],
+            'venda_concorrente': venda_concorrente[present]
+        })
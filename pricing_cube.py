@@ -0,0 +1,185 @@
+"""
+Monthly OLAP cube of the pricing data
+Additive measures (rbv, units, row count) at month x uf x canal x neogrupo x
+produto grain, plus month-sorted rollups and month prefix sums that answer
+the pricing getters for any date range
+
+Preço.csv is already monthly at that grain, so the full cube has about as
+many cells as the file has rows: it is kept for queries filtered on several
+dimensions and is not a size reduction. The savings are in the rollups and
+their prefix sums, which serve the unfiltered and single-dimension getters.
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMS = ['uf', 'canal', 'neogrupo', 'produto']
+CUBE_MEASURES = ['rbv', 'qt_unidade_vendida', 'linhas']
+
+# Rollups materializados (todos com 'mes'), do menor para o maior
+CUBE_ROLLUPS = {
+    'by_month': [],
+    'by_channel': ['canal'],
+    'by_state': ['uf'],
+    'by_product': ['neogrupo', 'produto'],
+    'cube': CUBE_DIMS
+}
+
+# Rollups com somas acumuladas por mês (o cubo completo não cabe numa grade densa)
+PREFIX_ROLLUPS = ['by_month', 'by_channel', 'by_state', 'by_product']
+
+# Listas de top produtos pré-calculadas (todos os meses), geral e por valor destas dimensões
+TOP_N_LISTED = 100
+TOP_LIST_DIMS = ['neogrupo', 'uf', 'canal']
+
+
+def top_k(values, k):
+    """Positions of the k largest values, largest first
+
+    argpartition isolates the k largest in O(n); only those k are sorted.
+    """
+    values = np.asarray(values)
+    k = max(0, min(int(k), len(values)))
+    if k < len(values):
+        top = np.argpartition(values, len(values) - k)[len(values) - k:]
+    else:
+        top = np.arange(len(values))
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+class PricingCube:
+    """Pricing measures summed per (mes, dimensions); each table is sorted by mes"""
+
+    def __init__(self, tables):
+        self.tables = tables  # {nome do rollup: DataFrame}
+        self.months = np.unique(tables['by_month']['mes'].to_numpy())
+        self.prefix = {name: self._build_prefix(tables[name], CUBE_ROLLUPS[name])
+                       for name in PREFIX_ROLLUPS}
+        self._top_lists = {}
+
+    @property
+    def nbytes(self):
+        tables = sum(df.memory_usage(index=True, deep=True).sum() for df in self.tables.values())
+        prefix = sum(array.nbytes for _, sums in self.prefix.values() for array in sums.values())
+        return int(tables + prefix)
+
+    def _build_prefix(self, df, dims):
+        """Distinct keys of a rollup and, per measure, a (months + 1) x keys cumulative grid
+
+        Row i of a grid holds the totals of the first i months, so any month
+        range is the difference of two rows.
+        """
+        month_codes = np.searchsorted(self.months, df['mes'].to_numpy())
+        if dims:
+            grouped = df.groupby(dims, observed=True, sort=True)
+            key_codes = grouped.ngroup().to_numpy()
+            keys = grouped.size().index.to_frame(index=False)
+        else:
+            key_codes = np.zeros(len(df), dtype=np.int64)
+            keys = pd.DataFrame(index=range(1))
+
+        sums = {}
+        for measure in CUBE_MEASURES:
+            values = df[measure].to_numpy()
+            grid = np.zeros((len(self.months) + 1, len(keys)), dtype=values.dtype)
+            grid[month_codes + 1, key_codes] = values  # (mes, chave) é único no rollup
+            sums[measure] = np.cumsum(grid, axis=0, out=grid)
+        return keys, sums
+
+    @classmethod
+    def build(cls, pricing_data):
+        """Aggregate the row-level pricing data once, then roll the cube up"""
+        cube = pricing_data.groupby(['mes'] + CUBE_DIMS, observed=True, sort=True).agg(
+            rbv=('rbv', 'sum'),
+            qt_unidade_vendida=('qt_unidade_vendida', 'sum'),
+            linhas=('rbv', 'size')
+        ).reset_index()
+        cube['qt_unidade_vendida'] = cube['qt_unidade_vendida'].astype('int64')
+        cube['linhas'] = cube['linhas'].astype('int64')
+
+        tables = {}
+        for name, dims in CUBE_ROLLUPS.items():
+            if dims == CUBE_DIMS:
+                tables[name] = cube
+            else:
+                tables[name] = cube.groupby(['mes'] + dims, observed=True, sort=True)[
+                    CUBE_MEASURES].sum().reset_index()
+        return cls(tables)
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Cube from saved tables, or None if any rollup is missing"""
+        if not all(name in tables for name in CUBE_ROLLUPS):
+            return None
+        return cls({name: tables[name] for name in CUBE_ROLLUPS})
+
+    @staticmethod
+    def _rollup_name(columns, names):
+        """Smallest of the named rollups holding every column, or None"""
+        for name in names:
+            if set(columns) <= set(CUBE_ROLLUPS[name] + CUBE_MEASURES + ['mes']):
+                return name
+        return None
+
+    def rollup(self, columns):
+        """Smallest rollup holding every dimension in columns"""
+        name = self._rollup_name(columns, CUBE_ROLLUPS)
+        if name is None:
+            raise KeyError(f"Colunas fora do cubo de preços: {sorted(set(columns))}")
+        return self.tables[name]
+
+    def prefix_rollup(self, columns):
+        """Smallest prefix-summed rollup holding every column (None if only the full cube does)"""
+        return self._rollup_name(columns, PREFIX_ROLLUPS)
+
+    def range_totals(self, name, start=None, end=None, by_month=False):
+        """Measures per key of a prefix rollup over the months in [start, end]
+
+        Each key costs two prefix rows (consecutive differences with by_month),
+        so the work depends on months x keys, never on the rows. Keys without
+        rows in the range are dropped.
+        """
+        keys, sums = self.prefix[name]
+        first = 0 if start is None else int(np.searchsorted(self.months, np.datetime64(start), side='left'))
+        last = len(self.months) if end is None else int(np.searchsorted(self.months, np.datetime64(end), side='right'))
+        last = max(first, last)
+
+        columns = {}
+        if by_month:
+            key_index = np.tile(np.arange(len(keys)), last - first)
+            columns['mes'] = np.repeat(self.months[first:last], len(keys))
+            totals = {measure: np.diff(cumulative[first:last + 1], axis=0).ravel()
+                      for measure, cumulative in sums.items()}
+        else:
+            key_index = np.arange(len(keys))
+            totals = {measure: cumulative[last] - cumulative[first] for measure, cumulative in sums.items()}
+
+        # Montar o resultado de uma vez: atribuir colunas uma a uma custa mais que as somas
+        keep = totals['linhas'] > 0
+        columns = {col: values[keep] for col, values in columns.items()}
+        columns.update({col: keys[col].array.take(key_index[keep]) for col in keys.columns})
+        columns.update({measure: values[keep] for measure, values in totals.items()})
+        return pd.DataFrame(columns)
+
+    def top_products(self, dimension=None, by='rbv'):
+        """Top TOP_N_LISTED products by a measure over all months, largest first
+
+        Returns {value: DataFrame(produto, rbv, qt_unidade_vendida, neogrupo)}
+        per value of dimension ({None: ...} overall). Built once per dimension
+        and measure from the cube, so the lists follow every cube rebuild.
+        """
+        key = (dimension, by)
+        if key not in self._top_lists:
+            keys = ['produto'] if dimension is None else [dimension, 'produto']
+            aggs = {'rbv': ('rbv', 'sum'), 'qt_unidade_vendida': ('qt_unidade_vendida', 'sum')}
+            if dimension != 'neogrupo':
+                aggs['neogrupo'] = ('neogrupo', 'first')
+            totals = self.tables['cube'].groupby(keys, observed=True, sort=True).agg(**aggs).reset_index()
+
+            groups = [(None, totals)] if dimension is None else totals.groupby(dimension, observed=True)
+            self._top_lists[key] = {
+                value: group.iloc[top_k(group[by].to_numpy(), TOP_N_LISTED)][
+                    ['produto', 'rbv', 'qt_unidade_vendida', 'neogrupo']].reset_index(drop=True)
+                for value, group in groups
+            }
+        return self._top_lists[key]
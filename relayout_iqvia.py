@@ -0,0 +1,131 @@
+"""
+Rewrite the monthly IQVIA parquet files into a scan-friendly dataset
+Hive-partitioned by id_periodo (optionally bucketed by cd_brick), sorted by
+cd_produto, zstd + dictionary encoded, with row groups sized for pruning
+
+Usage:
+    python relayout_iqvia.py [--data-dir .] [--buckets 16] [--row-group-size 131072]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_processor_optimized import (OptimizedDataProcessor, IQVIA_REQUIRED_COLS,
+                                      IQVIA_LAYOUT_DIR, IQVIA_LAYOUT_FILE, IQVIA_LAYOUT_VERSION)
+
+# Grupos de ~128k linhas: estatísticas min/max de cd_produto estreitas o bastante para podar
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+SORT_KEYS = [('cd_produto', 'ascending'), ('cd_filial', 'ascending')]
+
+
+def _write_partition(table, path, row_group_size):
+    """Write one sorted partition file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(
+        table.sort_by(SORT_KEYS),
+        path,
+        row_group_size=row_group_size,
+        compression='zstd',
+        use_dictionary=True,
+        write_statistics=True
+    )
+
+
+def relayout_month(file, output_dir, buckets=1, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """Rewrite one month file into id_periodo=YYYYMM[/cd_brick_bucket=k]/part-0.parquet
+
+    The month is written to a temporary directory and swapped in at the end,
+    so an interrupted run never leaves a half-written partition behind.
+    """
+    period = int(file.stem.split('_')[-1])
+    table = pq.read_table(file, columns=IQVIA_REQUIRED_COLS).drop_columns(['id_periodo'])
+
+    final_dir = output_dir / f"id_periodo={period}"
+    tmp_dir = output_dir / f".tmp-id_periodo={period}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if buckets > 1:
+        bucket_ids = table.column('cd_brick').to_numpy() % buckets
+        for bucket in range(buckets):
+            part = table.filter(pa.array(bucket_ids == bucket))
+            if part.num_rows:
+                _write_partition(part, tmp_dir / f"cd_brick_bucket={bucket}" / "part-0.parquet",
+                                 row_group_size)
+    else:
+        _write_partition(table, tmp_dir / "part-0.parquet", row_group_size)
+
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+    return table.num_rows
+
+
+def relayout(data_dir=".", buckets=1, row_group_size=DEFAULT_ROW_GROUP_SIZE, force=False):
+    """Re-layout every IQVIA month file, skipping months already converted"""
+    processor = OptimizedDataProcessor(data_dir)
+    output_dir = processor.data_dir / IQVIA_LAYOUT_DIR
+    layout_file = output_dir / IQVIA_LAYOUT_FILE
+
+    previous = {}
+    if layout_file.exists() and not force:
+        with open(layout_file, encoding='utf-8') as f:
+            layout = json.load(f)
+        # Mudou o formato ou o bucketing: reescrever tudo
+        if layout.get('version') == IQVIA_LAYOUT_VERSION and layout.get('buckets') == buckets \
+                and layout.get('row_group_size') == row_group_size:
+            previous = layout.get('sources', {})
+    if not previous:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    month_files = processor._iqvia_month_files()
+    sources = {}
+    for file in month_files:
+        fingerprint = processor._file_fingerprint(file, with_hash=False)
+        sources[file.name] = fingerprint
+        if previous.get(file.name) == fingerprint:
+            print(f"  - {file.name}: sem alterações")
+            continue
+
+        start = time.time()
+        rows = relayout_month(file, output_dir, buckets, row_group_size)
+        print(f"  - {file.name}: {rows:,} linhas em {time.time() - start:.1f}s")
+
+    # Partições de meses que não existem mais
+    periods = {f"id_periodo={file.stem.split('_')[-1]}" for file in month_files}
+    for partition in output_dir.glob("id_periodo=*"):
+        if partition.name not in periods:
+            shutil.rmtree(partition, ignore_errors=True)
+
+    layout = {
+        'version': IQVIA_LAYOUT_VERSION,
+        'buckets': buckets,
+        'row_group_size': row_group_size,
+        'sort': [key for key, _ in SORT_KEYS],
+        'sources': sources
+    }
+    tmp_file = output_dir / f"{IQVIA_LAYOUT_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(layout, f, indent=2)
+    os.replace(tmp_file, layout_file)
+
+    print(f"✓ Dataset IQVIA reorganizado em {output_dir}")
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reorganiza os parquets IQVIA para scans filtrados")
+    parser.add_argument('--data-dir', default=".", help="Diretório com historico_iqvia_*.parquet")
+    parser.add_argument('--buckets', type=int, default=1,
+                        help="Número de buckets por cd_brick dentro de cada mês (1 = sem bucket)")
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help="Linhas por row group")
+    parser.add_argument('--force', action='store_true', help="Reescrever todos os meses")
+    args = parser.parse_args()
+
+    relayout(args.data_dir, args.buckets, args.row_group_size, args.force)
@@ -0,0 +1,147 @@
+"""
+Size-bounded LRU/TTL cache for processor getter results
+Keyed on (method, arguments, active filters, data version), with memory
+accounting and hit/miss counters
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+
+def _freeze(value):
+    """Hashable form of a getter argument (lists/arrays of codes become tuples)"""
+    if isinstance(value, (list, tuple, set, frozenset, np.ndarray, pd.Index, pd.Series)):
+        items = sorted(value) if isinstance(value, (set, frozenset)) else list(value)
+        return (type(value).__name__, tuple(_freeze(item) for item in items))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _size_of(value):
+    """Approximate bytes held by a cached result"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Copy handed to callers so they cannot mutate the cached result"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+class ResultCache:
+    """LRU cache bounded by entry count and bytes, with an optional TTL (seconds)
+
+    Thread-safe: a processor and its with_filters views share one cache
+    across the Streamlit session threads.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, bytes, created_at)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, key, value):
+        """Store a result, evicting least recently used entries past the limits"""
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return  # Maior que o cache inteiro: não guardar
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Drop an entry; callers hold the lock"""
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Entries, bytes and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+def cached_result(method):
+    """Memoize a processor getter in its result cache
+
+    The key combines the method name, its arguments, the active date and
+    dimension filters and the processor's data version; callers always get a
+    copy of the result.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'result_cache', None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        key = (method.__qualname__, _freeze(args), _freeze(kwargs),
+               self.date_filter_start, self.date_filter_end,
+               _freeze(getattr(self, 'dimension_filters', None)), self.data_version)
+        hit, value = cache.get(key)
+        if not hit:
+            value = method(self, *args, **kwargs)
+            cache.set(key, value)
+        return _copy(value)
+    return wrapper
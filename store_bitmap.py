@@ -0,0 +1,95 @@
+"""
+Exact store-coverage bitmaps for the IQVIA aggregates
+One bit per store (cd_filial) per aggregate cell, packed into bytes
+"""
+
+import numpy as np
+
+# Número de bits ligados em cada valor de byte
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+# Linhas por bloco ao reorganizar bitmaps (limita o array booleano temporário)
+_REMAP_CHUNK = 20_000
+
+
+def bitmap_width(n_stores):
+    """Bytes per bitmap for a store dictionary of n_stores"""
+    return (n_stores + 7) // 8
+
+
+def bitmap_build(store_codes, group_codes, n_groups, n_stores):
+    """Packed bitmaps (n_groups, width) with the bit of each store code set per group"""
+    bitmaps = np.zeros((n_groups, bitmap_width(n_stores)), dtype=np.uint8)
+    if len(store_codes) == 0:
+        return bitmaps
+
+    store_codes = np.asarray(store_codes, dtype=np.int64)
+    bits = (np.uint8(0x80) >> (store_codes & 7).astype(np.uint8)).astype(np.uint8)
+    np.bitwise_or.at(bitmaps, (np.asarray(group_codes, dtype=np.int64), store_codes >> 3), bits)
+    return bitmaps
+
+
+def bitmap_merge(bitmaps, group_codes, n_groups):
+    """OR together the bitmap rows that share a group code"""
+    merged = np.zeros((n_groups, bitmaps.shape[1]), dtype=np.uint8)
+    if len(bitmaps):
+        np.bitwise_or.at(merged, np.asarray(group_codes, dtype=np.int64), bitmaps)
+    return merged
+
+
+def bitmap_or(bitmaps):
+    """Union of all bitmap rows"""
+    return np.bitwise_or.reduce(bitmaps, axis=0)
+
+
+def bitmap_and(bitmaps):
+    """Intersection of all bitmap rows"""
+    return np.bitwise_and.reduce(bitmaps, axis=0)
+
+
+def popcount(bitmaps):
+    """Number of set bits per bitmap row (or of a single bitmap)"""
+    return _POPCOUNT[bitmaps].sum(axis=-1)
+
+
+def bitmap_distinct(bitmaps, values):
+    """Distinct values among the set stores of each bitmap row
+
+    values is aligned with the store dictionary (e.g. the brick of each
+    store); rows are unpacked a block at a time.
+    """
+    uniques, codes = np.unique(values, return_inverse=True)
+    n_values = max(1, len(uniques))
+    counts = np.zeros(len(bitmaps), dtype=np.int64)
+    for start in range(0, len(bitmaps), _REMAP_CHUNK):
+        block = np.unpackbits(bitmaps[start:start + _REMAP_CHUNK], axis=1, count=len(values))
+        rows, stores = np.nonzero(block)
+        hits = np.zeros((len(block), n_values), dtype=bool)
+        hits[rows, codes[stores]] = True
+        counts[start:start + len(block)] = hits.sum(axis=1)
+    return counts
+
+
+def store_brick_dictionary(stores, bricks):
+    """Sorted distinct stores and the brick of each (its lowest if it ever changed)"""
+    stores, bricks = np.asarray(stores), np.asarray(bricks)
+    order = np.lexsort((bricks, stores))
+    stores, bricks = stores[order], bricks[order]
+    first = np.ones(len(stores), dtype=bool)
+    first[1:] = stores[1:] != stores[:-1]
+    return stores[first], bricks[first]
+
+
+def bitmap_remap(bitmaps, old_stores, new_stores):
+    """Re-lay bitmaps built on old_stores onto the (superset) dictionary new_stores"""
+    if np.array_equal(old_stores, new_stores):
+        return bitmaps
+
+    positions = np.searchsorted(new_stores, old_stores)
+    remapped = np.zeros((len(bitmaps), bitmap_width(len(new_stores))), dtype=np.uint8)
+    for start in range(0, len(bitmaps), _REMAP_CHUNK):
+        block = np.unpackbits(bitmaps[start:start + _REMAP_CHUNK], axis=1, count=len(old_stores))
+        expanded = np.zeros((len(block), len(new_stores)), dtype=np.uint8)
+        expanded[:, positions] = block
+        remapped[start:start + _REMAP_CHUNK] = np.packbits(expanded, axis=1)
+    return remapped
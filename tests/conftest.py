@@ -0,0 +1,79 @@
+"""
+Shared fixtures: a small synthetic copy of the source files in a temp directory
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+# Módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+IQVIA_PERIODS = [202501, 202502, 202503, 202504]
+UFS = ['SP', 'RJ', 'MG', 'PR']
+CATEGORIES = ['GLP-1 MARCA', 'MEDICAMENTO MARCA', 'MEDICAMENTO GENÉRICO', 'PERFUMARIA', 'OTC MARCA']
+
+
+def write_iqvia_month(data_dir, period, rng, rows=4_000):
+    """One historico_iqvia_YYYYMM.parquet with several row groups"""
+    df = pd.DataFrame({
+        'cd_produto': rng.integers(1, 300, rows),
+        'cd_filial': rng.integers(1, 200, rows),
+        'id_periodo': period,
+        'venda_rd': rng.integers(0, 20, rows) * (rng.random(rows) > 0.35),
+        'venda_concorrente': rng.integers(1, 40, rows)
+    }).drop_duplicates(['cd_produto', 'cd_filial'])
+    df.insert(2, 'cd_brick', df['cd_filial'] % 37)
+    df['share'] = df['venda_rd'] / (df['venda_rd'] + df['venda_concorrente'])
+    file = Path(data_dir) / f"historico_iqvia_{period}.parquet"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), file, row_group_size=1_000)
+    return file
+
+
+def write_pricing(data_dir, rng, rows=5_000):
+    """Preço.csv over six months"""
+    months = pd.date_range('2025-01-01', periods=6, freq='MS').strftime('%Y-%m-%d')
+    products = rng.integers(1, 300, rows)
+    units = rng.integers(1, 100, rows)
+    price = rng.random(rows) * 100 + 5
+    pd.DataFrame({
+        'mes': np.asarray(months)[rng.integers(0, len(months), rows)],
+        'uf': np.asarray(UFS)[rng.integers(0, len(UFS), rows)],
+        'produto': products,
+        'neogrupo': np.asarray(CATEGORIES)[products % len(CATEGORIES)],
+        'canal': np.where(rng.random(rows) < 0.85, 'App', 'Site'),
+        'qt_unidade_vendida': units,
+        'rbv': units * price,
+        'preco_medio': price
+    }).to_csv(Path(data_dir) / "Preço.csv", index=False, encoding='utf-8')
+
+
+@pytest.fixture(autouse=True)
+def _clean_env(monkeypatch):
+    """Tests run with the defaults, whatever RD_* the shell exports"""
+    for name in list(os.environ):
+        if name.startswith('RD_'):
+            monkeypatch.delenv(name)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Directory with Preço.csv and IQVIA_PERIODS month files"""
+    rng = np.random.default_rng(0)
+    write_pricing(tmp_path, rng)
+    for period in IQVIA_PERIODS:
+        write_iqvia_month(tmp_path, period, rng)
+    return tmp_path
+
+
+def assert_same_rows(expected, actual, keys):
+    """Frames equal up to row order (sorted by keys) and a float tolerance"""
+    expected = expected.sort_values(keys, ignore_index=True)
+    actual = actual[expected.columns].sort_values(keys, ignore_index=True)
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=False, rtol=1e-9)
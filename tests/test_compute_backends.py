@@ -0,0 +1,44 @@
+"""
+Compute backends agreeing with each other
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute_backends import COMPUTE_BACKENDS, get_compute_backend
+from data_processor_optimized import OptimizedDataProcessor
+
+
+@pytest.fixture
+def pricing_frame(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.load_pricing_data_fast()
+    return processor.pricing_data
+
+
+@pytest.mark.parametrize('keys', [[], ['uf'], ['mes', 'canal'], ['produto']])
+def test_backends_agree(pricing_frame, keys):
+    aggs = {
+        'rbv': ('rbv', 'sum'),
+        'qt_unidade_vendida': ('qt_unidade_vendida', 'sum'),
+        'preco_medio': ('preco_medio', 'mean'),
+        'produtos': ('produto', 'nunique'),
+        'neogrupo': ('neogrupo', 'first'),
+        'linhas': ('rbv', 'size')
+    }
+    months = pricing_frame['mes'].sort_values().unique()
+    filters = {'mes': (months[1], months[-2])}
+    rows = np.flatnonzero(pricing_frame['uf'].to_numpy() != 'SP')
+
+    expected = get_compute_backend('pandas').groupby_agg(pricing_frame, keys, aggs, filters, rows)
+    assert len(expected)
+    for name in COMPUTE_BACKENDS:
+        try:
+            backend = get_compute_backend(name)
+        except ImportError:
+            continue  # Backend opcional não instalado
+        result = backend.groupby_agg(pricing_frame, keys, aggs, filters, rows)
+        # preco_medio é float32: as médias só coincidem até a precisão de float32
+        pd.testing.assert_frame_equal(expected, result, check_exact=False, rtol=1e-6, obj=name)
+
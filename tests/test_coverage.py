@@ -0,0 +1,41 @@
+"""
+Distinct store/brick counts against the raw IQVIA rows
+"""
+
+import pandas as pd
+
+from data_processor_optimized import OptimizedDataProcessor
+
+
+def raw_iqvia(data_dir):
+    return pd.concat([pd.read_parquet(file) for file in sorted(data_dir.glob("historico_iqvia_*.parquet"))],
+                     ignore_index=True)
+
+
+def test_bitmap_grain_counts_are_exact(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.quick_load(use_cache=False)
+    assert processor.iqvia_grain == 'bitmap'
+    raw = raw_iqvia(data_dir)
+
+    metrics = processor.get_market_share_metrics()
+    assert metrics['unique_stores'] == raw['cd_filial'].nunique()
+    assert metrics['unique_bricks'] == raw['cd_brick'].nunique()
+
+    expected = raw.groupby('cd_produto').agg(unique_stores=('cd_filial', 'nunique'),
+                                             unique_bricks=('cd_brick', 'nunique')).reset_index()
+    pd.testing.assert_frame_equal(processor.get_unique_coverage('cd_produto'), expected, check_dtype=False)
+
+
+def test_bitmap_counts_survive_snapshot_and_streaming(data_dir):
+    OptimizedDataProcessor(data_dir).quick_load()
+    restored = OptimizedDataProcessor(data_dir)
+    assert restored.load_snapshot()
+    streaming = OptimizedDataProcessor(data_dir)
+    streaming.load_iqvia_all(streaming=True, batch_size=700)
+
+    raw = raw_iqvia(data_dir)
+    for processor in (restored, streaming):
+        metrics = processor.get_market_share_metrics()
+        assert (metrics['unique_stores'], metrics['unique_bricks']) == \
+            (raw['cd_filial'].nunique(), raw['cd_brick'].nunique())
@@ -0,0 +1,30 @@
+"""
+Dashboard bundle on filter states with no data on one side
+"""
+
+import pytest
+
+from data_processor_optimized import OptimizedDataProcessor
+
+
+@pytest.fixture
+def processor(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.quick_load(use_cache=False)
+    return processor
+
+
+def test_bundle_without_iqvia_months(processor):
+    # Preços vão até junho, IQVIA só até abril
+    bundle = processor.with_filters('2025-05-01', '2025-06-30').get_dashboard_bundle()
+
+    assert bundle['market_share_metrics'] == {}
+    assert bundle['revenue_metrics']['total_revenue'] > 0
+    assert not any(insight['category'] == 'Market Share' for insight in bundle['insights'])
+
+
+def test_bundle_without_pricing_rows(processor):
+    bundle = processor.get_dashboard_bundle({'canal': 'Loja'})
+
+    assert bundle['channel_performance'].empty
+    assert bundle['top_products'].empty
@@ -0,0 +1,29 @@
+"""
+IQVIA cube geography through filtered views
+"""
+
+import pandas as pd
+
+from data_processor_optimized import OptimizedDataProcessor
+
+
+def test_views_share_the_cube_and_the_result_cache(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.quick_load(use_cache=False)
+    processor.get_revenue_metrics()
+
+    view = processor.with_filters('2025-02-01', '2025-03-31')
+    by_brick = view.get_geo_share()
+    assert processor.iqvia_cube is view.iqvia_cube
+    # Carregar o cubo sob demanda não descarta os resultados já calculados
+    assert processor.result_cache_stats()['entries'] == 2
+
+    raw = pd.concat([pd.read_parquet(data_dir / f"historico_iqvia_{period}.parquet")
+                     for period in (202502, 202503)])
+    expected = raw.groupby('cd_brick')[['venda_rd', 'venda_concorrente']].sum()
+    result = by_brick.set_index('cd_brick')[['venda_rd', 'venda_concorrente']]
+    pd.testing.assert_frame_equal(result.loc[expected.index], expected, check_dtype=False)
+
+    other = processor.with_filters('2025-01-01', '2025-04-30', neogrupo='PERFUMARIA')
+    other.get_geo_share()
+    assert other.iqvia_cube is processor.iqvia_cube
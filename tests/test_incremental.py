@@ -0,0 +1,37 @@
+"""
+Incremental month ingestion against a full rebuild
+"""
+
+from conftest import assert_same_rows
+from data_processor_optimized import OptimizedDataProcessor
+
+
+def assert_same_iqvia(expected, actual):
+    """Same IQVIA aggregate and derived aggregations"""
+    assert_same_rows(expected.iqvia_data, actual.iqvia_data, ['id_periodo', 'cd_produto'])
+    assert expected.iqvia_aggregated.keys() == actual.iqvia_aggregated.keys()
+    for name, df in expected.iqvia_aggregated.items():
+        assert_same_rows(df, actual.iqvia_aggregated[name], ['data'] if name == 'by_period' else ['cd_produto'])
+
+
+def full_load(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.quick_load(use_cache=False)
+    return processor
+
+
+def test_incremental_ingest_matches_full_rebuild(data_dir, tmp_path_factory):
+    parked = tmp_path_factory.mktemp("parked")
+    added = data_dir / "historico_iqvia_202504.parquet"
+    removed = data_dir / "historico_iqvia_202502.parquet"
+
+    # Snapshot sem o último mês, depois um mês novo e um removido
+    added.rename(parked / added.name)
+    OptimizedDataProcessor(data_dir).quick_load()
+    (parked / added.name).rename(added)
+    removed.rename(parked / removed.name)
+
+    incremental = OptimizedDataProcessor(data_dir)
+    assert incremental.load_snapshot(incremental=True)
+    assert sorted(incremental.iqvia_data['id_periodo'].unique()) == [202501, 202503, 202504]
+    assert_same_iqvia(full_load(data_dir), incremental)
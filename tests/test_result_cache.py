@@ -0,0 +1,41 @@
+"""
+Result cache shared between threads
+"""
+
+import sys
+import threading
+
+from result_cache import ResultCache
+
+
+def test_concurrent_get_set_with_expiry_and_eviction():
+    # TTL e limite de entradas mínimos: expiração e despejo o tempo todo
+    cache = ResultCache(max_entries=8, ttl=1e-6)
+    errors = []
+
+    def worker(seed):
+        try:
+            for i in range(20_000):
+                key = (seed + i) % 16
+                hit, _ = cache.get(key)
+                if not hit:
+                    cache.set(key, i)
+        except Exception as e:  # noqa: BLE001 - qualquer erro da thread falha o teste
+            errors.append(e)
+
+    # Trocas de thread frequentes para expor corridas entre get/set
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    stats = cache.stats()
+    assert stats['entries'] <= 8
+    assert stats['hits'] + stats['misses'] == 8 * 20_000
@@ -0,0 +1,20 @@
+"""
+On-disk snapshot round-trip
+"""
+
+import pandas as pd
+
+from data_processor_optimized import OptimizedDataProcessor
+
+
+def test_snapshot_round_trip(data_dir):
+    loaded = OptimizedDataProcessor(data_dir)
+    loaded.quick_load(use_cache=False)
+    loaded.save_snapshot()
+
+    restored = OptimizedDataProcessor(data_dir)
+    assert restored.load_snapshot()
+    for name, df in loaded._snapshot_tables().items():
+        pd.testing.assert_frame_equal(df.reset_index(drop=True),
+                                      restored._snapshot_tables()[name].reset_index(drop=True), obj=name)
+    pd.testing.assert_frame_equal(loaded.get_top_products(top_n=10), restored.get_top_products(top_n=10))
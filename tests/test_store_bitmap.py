@@ -0,0 +1,32 @@
+"""
+Store bitmaps against the raw IQVIA rows
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processor_optimized import OptimizedDataProcessor
+from hll_sketch import from_bytes
+from store_bitmap import bitmap_remap, popcount
+
+
+def test_cell_bitmaps_match_raw_stores(data_dir):
+    processor = OptimizedDataProcessor(data_dir)
+    processor.load_iqvia_all()
+    data = processor.iqvia_data.sort_values(['id_periodo', 'cd_produto'], ignore_index=True)
+    rows = pd.concat([pd.read_parquet(file) for file in sorted(data_dir.glob("historico_iqvia_*.parquet"))])
+    stores = rows.groupby(['id_periodo', 'cd_produto'])['cd_filial'].nunique().to_numpy()
+    zero = rows[rows['venda_rd'] == 0].groupby(['id_periodo', 'cd_produto'])['cd_filial'].nunique()
+    zero = zero.reindex(pd.MultiIndex.from_frame(data[['id_periodo', 'cd_produto']]), fill_value=0).to_numpy()
+
+    np.testing.assert_array_equal(popcount(from_bytes(data['bm_filial'])), stores)
+    np.testing.assert_array_equal(popcount(from_bytes(data['bm_zero'])), zero)
+
+
+def test_remap_keeps_the_same_stores():
+    old_stores = np.array([3, 8, 20])
+    new_stores = np.array([1, 3, 5, 8, 13, 20])
+    bitmaps = np.packbits(np.array([[1, 0, 1], [0, 1, 0]], dtype=np.uint8), axis=1)
+
+    remapped = np.unpackbits(bitmap_remap(bitmaps, old_stores, new_stores), axis=1, count=len(new_stores))
+    np.testing.assert_array_equal(remapped, [[0, 1, 0, 0, 0, 1], [0, 0, 0, 1, 0, 0]])
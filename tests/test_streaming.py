@@ -0,0 +1,19 @@
+"""
+Streaming IQVIA aggregation against the in-memory path
+"""
+
+import numpy as np
+
+from conftest import assert_same_rows
+from data_processor_optimized import OptimizedDataProcessor
+
+
+def test_streaming_matches_in_memory(data_dir):
+    in_memory = OptimizedDataProcessor(data_dir)
+    in_memory.load_iqvia_all(streaming=False)
+    streaming = OptimizedDataProcessor(data_dir)
+    # Lotes menores que um grupo de linhas: vários lotes por mês
+    streaming.load_iqvia_all(streaming=True, batch_size=700)
+
+    assert_same_rows(in_memory.iqvia_data, streaming.iqvia_data, ['id_periodo', 'cd_produto'])
+    np.testing.assert_array_equal(in_memory.store_index, streaming.store_index)
@@ -0,0 +1,264 @@
+"""
+Store-level zero-sales opportunity index
+Per month, one array of (cd_produto, cd_filial, venda_concorrente) cells where
+RD sold nothing while competitors sold, sorted by product and store. The month
+is implied by the file and the brick by the store, so neither is stored. The
+arrays are written to disk during ingestion and memory-mapped afterwards
+"""
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from iqvia_cube import concat_ranges
+
+ZERO_INDEX_VERSION = 2
+ZERO_CELL_DTYPE = np.dtype([('cd_produto', '<i4'), ('cd_filial', '<i4'), ('venda_concorrente', '<i4')])
+ZERO_CELL_BYTES = ZERO_CELL_DTYPE.itemsize
+
+# Colunas devolvidas pelas consultas (mês e brick reconstruídos)
+ZERO_SALES_COLS = ['id_periodo', 'cd_produto', 'cd_filial', 'cd_brick', 'venda_concorrente']
+
+_BRICK_MASK = np.int64(0xFFFFFFFF)
+
+
+def _int32(values, name):
+    """Values as int32, refusing silent overflow"""
+    if len(values) and (values.max() > np.iinfo(np.int32).max or values.min() < np.iinfo(np.int32).min):
+        raise OverflowError(f"{name} não cabe em int32 no índice de venda zero")
+    return values.astype(np.int32, copy=False)
+
+
+def zero_cells(df):
+    """Zero-sales cells of raw IQVIA rows (venda_rd == 0 and venda_concorrente > 0), unsorted"""
+    zero = (df['venda_rd'].to_numpy() == 0) & (df['venda_concorrente'].to_numpy() > 0)
+    cells = np.empty(int(zero.sum()), dtype=ZERO_CELL_DTYPE)
+    for name in ZERO_CELL_DTYPE.names:
+        cells[name] = _int32(df[name].to_numpy()[zero], name)
+    return cells
+
+
+def store_brick_keys(df):
+    """Sorted distinct cd_filial << 32 | cd_brick keys of raw IQVIA rows"""
+    keys = (_int32(df['cd_filial'].to_numpy(), 'cd_filial').astype(np.int64) << 32) \
+        | _int32(df['cd_brick'].to_numpy(), 'cd_brick').astype(np.int64)
+    return np.unique(pd.unique(keys))
+
+
+def _cell_keys(cells):
+    """Sort key of cells: product, then store"""
+    return (cells['cd_produto'].astype(np.int64) << 32) | cells['cd_filial'].astype(np.int64)
+
+
+def _load_array(file):
+    """Memory-map a saved array (empty arrays cannot be mapped and are read)"""
+    try:
+        return np.load(file, mmap_mode='r')
+    except ValueError:
+        return np.load(file)
+
+
+class ZeroSalesWriter:
+    """Writes one month of cells sorted by product and store, one bucket in memory at a time
+
+    Cells are appended to product-range bucket files as batches arrive; close()
+    sorts the buckets one by one into the month's array, so a streaming load
+    never holds more than a bucket of cells.
+    """
+
+    def __init__(self, directory, period, product_range=None, buckets=1):
+        self.directory = Path(directory)
+        self.period = period
+        low, high = product_range if product_range is not None else (0, 0)
+        buckets = max(1, int(buckets)) if product_range is not None else 1
+        self.edges = np.linspace(low, high + 1, buckets + 1)[1:-1]
+        self.bucket_files = [self.directory / f".{period}.bucket{i}.tmp" for i in range(buckets)]
+        for file in self.bucket_files:
+            open(file, 'wb').close()
+        self.store_bricks = np.array([], dtype=np.int64)
+
+    def add(self, df):
+        """Append the zero-sales cells of a raw batch to their buckets"""
+        self.store_bricks = np.union1d(self.store_bricks, store_brick_keys(df))
+        cells = zero_cells(df)
+        if len(self.bucket_files) == 1:
+            parts = [cells]
+        else:
+            bucket = np.searchsorted(self.edges, cells['cd_produto'], side='right')
+            order = np.argsort(bucket, kind='stable')
+            bounds = np.searchsorted(bucket[order], np.arange(len(self.bucket_files) + 1))
+            parts = [cells[order[bounds[i]:bounds[i + 1]]] for i in range(len(self.bucket_files))]
+        for file, part in zip(self.bucket_files, parts):
+            if len(part):
+                with open(file, 'ab') as f:
+                    part.tofile(f)
+
+    def close(self):
+        """Sort the buckets into {period}.npy (replaced atomically) -> number of cells"""
+        sizes = [os.path.getsize(file) // ZERO_CELL_BYTES for file in self.bucket_files]
+        target = self.directory / f"{self.period}.npy"
+        tmp = self.directory / f".{self.period}.npy.tmp"
+        try:
+            if sum(sizes):
+                out = np.lib.format.open_memmap(tmp, mode='w+', dtype=ZERO_CELL_DTYPE, shape=(sum(sizes),))
+                position = 0
+                for file, size in zip(self.bucket_files, sizes):
+                    bucket = np.fromfile(file, dtype=ZERO_CELL_DTYPE)
+                    out[position:position + size] = bucket[np.argsort(_cell_keys(bucket), kind='stable')]
+                    position += size
+                    os.remove(file)
+                out.flush()
+                del out
+            else:
+                with open(tmp, 'wb') as f:
+                    np.save(f, np.empty(0, dtype=ZERO_CELL_DTYPE))
+            np.save(self.directory / f"{self.period}_bricks.npy", self.store_bricks)
+            os.replace(tmp, target)
+        finally:
+            for file in self.bucket_files + [tmp]:
+                if file.exists():
+                    os.remove(file)
+        return int(sum(sizes))
+
+
+class ZeroSalesIndex:
+    """Memory-mapped per-month zero-sales arrays of a directory"""
+
+    def __init__(self, path, blocks, store_bricks, build_id=None):
+        self.path = Path(path)
+        self.blocks = blocks              # {id_periodo: células ordenadas por (produto, loja)}
+        self.store_bricks = store_bricks  # chaves loja << 32 | brick ordenadas
+        self.build_id = build_id
+
+    @property
+    def periods(self):
+        return sorted(self.blocks)
+
+    @property
+    def n_cells(self):
+        return int(sum(len(block) for block in self.blocks.values()))
+
+    @property
+    def nbytes(self):
+        """Size of the cell arrays (mapped pages count only once touched)"""
+        return self.n_cells * ZERO_CELL_BYTES
+
+    @staticmethod
+    def read_meta(path):
+        """meta.json of a saved index, or None"""
+        try:
+            with open(Path(path) / "meta.json", encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == ZERO_INDEX_VERSION else None
+
+    @staticmethod
+    def write_meta(path, periods):
+        """Record the index's months under a new build id -> build id"""
+        build_id = uuid.uuid4().hex
+        tmp = Path(path) / "meta.json.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': ZERO_INDEX_VERSION, 'periods': sorted(int(p) for p in periods),
+                       'build_id': build_id}, f, indent=2)
+        os.replace(tmp, Path(path) / "meta.json")
+        return build_id
+
+    @staticmethod
+    def invalidate(path):
+        """Drop the meta.json so an index being rewritten in place is never loaded"""
+        (Path(path) / "meta.json").unlink(missing_ok=True)
+
+    @staticmethod
+    def publish(staging, path, periods):
+        """Replace the index at path with the months written to staging"""
+        path = Path(path)
+        for file in Path(staging).glob("*.npy"):
+            if int(file.stem.split('_')[0]) not in periods:
+                os.remove(file)
+        ZeroSalesIndex.write_meta(staging, periods)
+
+        old_dir = path.parent / f".old-{path.name}"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if path.exists():
+            os.rename(path, old_dir)
+        os.rename(staging, path)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @staticmethod
+    def update(path, periods, stale=()):
+        """Drop stale months not rewritten in place and record the index's months"""
+        path = Path(path)
+        for period in set(stale) - set(periods):
+            for file in (path / f"{period}.npy", path / f"{period}_bricks.npy"):
+                if file.exists():
+                    os.remove(file)
+        return ZeroSalesIndex.write_meta(path, periods)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved index, or None if there is none"""
+        path = Path(path)
+        meta = cls.read_meta(path)
+        if meta is None:
+            return None
+        blocks = {period: _load_array(path / f"{period}.npy") for period in meta['periods']}
+        keys = [np.load(path / f"{period}_bricks.npy") for period in meta['periods']]
+        store_bricks = np.unique(np.concatenate(keys)) if keys else np.array([], dtype=np.int64)
+        return cls(path, blocks, store_bricks, meta['build_id'])
+
+    def _select_periods(self, periods):
+        """Months of an inclusive (start, end) YYYYMM range or a list"""
+        if periods is None:
+            return self.periods
+        if isinstance(periods, tuple) and len(periods) == 2:
+            return [p for p in self.periods if periods[0] <= p <= periods[1]]
+        return [p for p in np.atleast_1d(periods).tolist() if p in self.blocks]
+
+    def _bricks_of(self, stores):
+        """Brick of each store (its first brick if it ever changed)"""
+        if not len(self.store_bricks):
+            return np.zeros(len(stores), dtype=np.int32)
+        key_stores = self.store_bricks >> 32
+        positions = np.clip(np.searchsorted(key_stores, stores), 0, len(key_stores) - 1)
+        return (self.store_bricks[positions] & _BRICK_MASK).astype(np.int32)
+
+    def select(self, periods=None, products=None, stores=None, bricks=None):
+        """Cells matching the filters, with id_periodo and cd_brick restored
+
+        Each product is a contiguous run of its month found by binary search;
+        bricks become their stores, which are then checked on the selected
+        cells only.
+        """
+        products = None if products is None else np.unique(np.atleast_1d(products))
+        if bricks is not None:
+            brick_keys = self.store_bricks[np.isin(self.store_bricks & _BRICK_MASK, np.atleast_1d(bricks))]
+            brick_stores = np.unique(brick_keys >> 32)
+            stores = brick_stores if stores is None else np.intersect1d(np.atleast_1d(stores), brick_stores)
+
+        frames = []
+        for period in self._select_periods(periods):
+            block = self.blocks[period]
+            if products is not None:
+                run = block['cd_produto']
+                block = block[concat_ranges(np.searchsorted(run, products, side='left'),
+                                      np.searchsorted(run, products, side='right'))]
+            else:
+                block = np.asarray(block)
+            if stores is not None:
+                block = block[np.isin(block['cd_filial'], np.atleast_1d(stores))]
+            frames.append(pd.DataFrame({
+                'id_periodo': np.full(len(block), period, dtype=np.int32),
+                'cd_produto': block['cd_produto'],
+                'cd_filial': block['cd_filial'],
+                'cd_brick': self._bricks_of(block['cd_filial']),
+                'venda_concorrente': block['venda_concorrente']
+            }))
+        if not frames:
+            return pd.DataFrame({col: np.array([], dtype=np.int32) for col in ZERO_SALES_COLS})
+        return pd.concat(frames, ignore_index=True)